@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""
+Soutk Cross-Engine Comparison
+Runs Soutk programs on every interpreter engine in the repository, checks that
+their output matches a reference engine and tabulates time and memory per engine.
+
+Usage:
+    python benchmarks/compare_engines.py
+    python benchmarks/compare_engines.py examples/ Programs/fibonacci.stk
+    python benchmarks/compare_engines.py --engines main,ultimate --output engines.json
+"""
+
+import argparse
+import json
+import math
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+from run_benchmarks import (BENCHMARK_DIR, ROOT_DIR, ENGINES, load_engine, load_workload, run_once, time_once,
+                            peak_memory)
+
+# Output that shows an engine did not understand the program
+ERROR_MARKERS = ("❌", "💥", "🛑", "⚠️", "DEBUG:", "Traceback")
+
+
+def run_worker(engine_name, program, repeat):
+    """Measure one program on one engine (runs in a child process) and print JSON"""
+    code = load_workload(program)[1]
+    result = {'output': None, 'times': [], 'peak_memory': None, 'crash': None}
+    try:
+        engine = load_engine(engine_name)
+        result['output'] = run_once(engine, code, program)
+        result['times'] = [time_once(engine, code, program) for _ in range(repeat)]
+        result['peak_memory'] = peak_memory(engine, code, program)
+    except BaseException as e:
+        result['crash'] = f"{type(e).__name__}: {e}"
+    sys.stdout.write(json.dumps(result))
+
+
+def measure(engine_name, program, repeat, timeout):
+    """Run the worker for one engine/program pair in a separate process"""
+    try:
+        completed = subprocess.run(
+            [sys.executable, __file__, '--worker', engine_name, str(program), '--repeat', str(repeat)],
+            capture_output=True, text=True, encoding='utf-8', timeout=timeout, stdin=subprocess.DEVNULL)
+    except subprocess.TimeoutExpired:
+        return {'status': 'timeout'}
+
+    try:
+        result = json.loads(completed.stdout)
+    except ValueError:
+        return {'status': 'crash', 'detail': completed.stderr.strip().splitlines()[-1:] or ''}
+
+    if result['crash']:
+        return {'status': 'crash', 'detail': result['crash']}
+    output = normalize(result['output'])
+    return {
+        'status': 'error' if any(marker in output for marker in ERROR_MARKERS) else 'clean',
+        'output': output,
+        'median': statistics.median(result['times']),
+        'peak_memory': result['peak_memory']
+    }
+
+
+def normalize(output):
+    """Normalise program output for comparison"""
+    return "\n".join(line.rstrip() for line in output.strip().splitlines())
+
+
+def collect_programs(paths):
+    """Expand files and directories into a sorted list of .stk programs"""
+    programs = []
+    for path in paths:
+        path = Path(path)
+        if path.is_dir():
+            programs.extend(sorted(path.glob('*.stk')))
+        elif path.suffix == '.stk':
+            programs.append(path)
+    return programs
+
+
+def compare(programs, engines, reference, repeat, timeout):
+    """Run every program on every engine and classify each result against the reference"""
+    table = {}
+    for program in programs:
+        row = {name: measure(name, program, repeat, timeout) for name in engines}
+        ref = row.get(reference)
+        for name, cell in row.items():
+            if cell['status'] != 'clean':
+                continue
+            if name == reference:
+                cell['status'] = 'reference'
+            elif ref and ref['status'] in ('clean', 'reference') and cell['output'] == ref['output']:
+                cell['status'] = 'same'
+            elif ref and ref['status'] in ('clean', 'reference'):
+                cell['status'] = 'differs'
+        table[str(program)] = row
+        print_row(program, row, engines)
+    return table
+
+
+SYMBOLS = {'reference': '◆', 'same': '✓', 'differs': '≠', 'clean': '?', 'error': '✗', 'crash': '💥', 'timeout': '⏳'}
+
+
+def print_header(engines):
+    print(f"{'program':<34}" + "".join(f"{name:>14}" for name in engines))
+    print("-" * (34 + 14 * len(engines)))
+
+
+def print_row(program, row, engines):
+    cells = []
+    for name in engines:
+        cell = row[name]
+        if 'median' in cell:
+            cells.append(f"{SYMBOLS[cell['status']]} {cell['median'] * 1000:>9.2f}ms")
+        else:
+            cells.append(f"{SYMBOLS[cell['status']]:>13}")
+    label = program.name if len(str(program)) > 33 else str(program)
+    print(f"{label:<34}" + "".join(f"{cell:>14}" for cell in cells))
+
+
+def summarize(table, engines, reference):
+    """Per-engine totals: correct programs, time/memory on them, and speed relative to the reference"""
+    summary = {}
+    for name in engines:
+        correct = [row[name] for row in table.values() if row[name]['status'] in ('reference', 'same')]
+        ratios = [row[reference]['median'] / row[name]['median'] for row in table.values()
+                  if row[name]['status'] == 'same' and row[reference]['status'] == 'reference'
+                  and row[name]['median'] > 0]
+        summary[name] = {
+            'correct': len(correct),
+            'programs': len(table),
+            'total_time': sum(cell['median'] for cell in correct),
+            'max_peak_memory': max((cell['peak_memory'] for cell in correct), default=0),
+            'speedup_vs_reference': math.exp(statistics.fmean(map(math.log, ratios))) if ratios else None
+        }
+    return summary
+
+
+def print_summary(summary, reference):
+    print()
+    print(f"{'engine':<10} {'correct':>9} {'time ms':>10} {'peak KiB':>10} {'speed vs ' + reference:>16}")
+    print("-" * 59)
+    for name, stats in summary.items():
+        speed = f"{stats['speedup_vs_reference']:>15.2f}x" if stats['speedup_vs_reference'] else f"{'-':>16}"
+        print(f"{name:<10} {stats['correct']:>4}/{stats['programs']:<4} {stats['total_time'] * 1000:>10.2f} "
+              f"{stats['max_peak_memory'] / 1024:>10.1f} {speed}")
+    print()
+    print("◆ reference  ✓ same output  ≠ different output  ? ran cleanly, reference did not")
+    print("✗ errors (unsupported syntax)  💥 crash  ⏳ timeout")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare Soutk interpreter engines")
+    parser.add_argument("paths", nargs="*", help="programs or directories (default: benchmarks, examples, Programs)")
+    parser.add_argument("--engines", default=",".join(ENGINES), help="comma-separated engine names")
+    parser.add_argument("--reference", default="main", help="engine whose output is treated as correct")
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs per program and engine")
+    parser.add_argument("--timeout", type=float, default=30.0, help="seconds allowed per program and engine")
+    parser.add_argument("--output", help="write the comparison as JSON to this file")
+    parser.add_argument("--worker", nargs=2, metavar=("ENGINE", "PROGRAM"), help=argparse.SUPPRESS)
+    options = parser.parse_args(argv)
+
+    if options.worker:
+        run_worker(options.worker[0], options.worker[1], options.repeat)
+        return 0
+
+    engines = [name.strip() for name in options.engines.split(",") if name.strip()]
+    unknown = [name for name in engines + [options.reference] if name not in ENGINES]
+    if unknown:
+        parser.error(f"unknown engine(s): {', '.join(unknown)} (available: {', '.join(ENGINES)})")
+    if options.reference not in engines:
+        engines.insert(0, options.reference)
+
+    paths = options.paths or [BENCHMARK_DIR, ROOT_DIR / 'examples', ROOT_DIR / 'Programs']
+    programs = collect_programs(paths)
+
+    print("⚖️ Soutk Cross-Engine Comparison")
+    print("=" * (34 + 14 * len(engines)))
+    print_header(engines)
+    table = compare(programs, engines, options.reference, options.repeat, options.timeout)
+    summary = summarize(table, engines, options.reference)
+    print_summary(summary, options.reference)
+
+    if options.output:
+        with open(options.output, 'w', encoding='utf-8') as f:
+            json.dump({'reference': options.reference, 'summary': summary, 'programs': table}, f, indent=2)
+        print(f"\n📁 Comparison written to {options.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
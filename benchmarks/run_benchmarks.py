@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+"""
+Soutk Benchmark Runner
+Times representative Soutk workloads, records the results as JSON and fails
+when a run regresses past a threshold against a baseline file.
+
+Usage:
+    python benchmarks/run_benchmarks.py
+    python benchmarks/run_benchmarks.py --output results.json
+    python benchmarks/run_benchmarks.py --baseline baseline.json --threshold 0.10
+"""
+
+import argparse
+import contextlib
+import importlib.util
+import io
+import json
+import math
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+BENCHMARK_DIR = Path(__file__).resolve().parent
+ROOT_DIR = BENCHMARK_DIR.parent
+
+# The main engine imports its sibling modules (e.g. soutk_transpiler) from src
+sys.path.insert(0, str(ROOT_DIR / 'src'))
+
+# Interpreter engines a workload can run on (selected with a "// engine: name" header)
+ENGINES = {
+    'main': ROOT_DIR / 'src' / 'soutk_interpreter.py',
+    'ultimate': ROOT_DIR / 'Interpreters' / 'soutk_ultimate.py',
+    'enhanced': ROOT_DIR / 'Interpreters' / 'soutk_enhanced.py',
+    'legacy': ROOT_DIR / 'Interpreters' / 'soutk_interpreter.py',
+    'semi': ROOT_DIR / 'Interpreters' / 'Just_a_semi_one.py',
+    'temp': ROOT_DIR / 'Interpreters' / 'temp.py'
+}
+
+_loaded_engines = {}
+
+
+def load_engine(name):
+    """Import an interpreter engine module from its file path"""
+    if name not in _loaded_engines:
+        if name not in ENGINES:
+            raise ValueError(f"Unknown engine '{name}' (available: {', '.join(ENGINES)})")
+        spec = importlib.util.spec_from_file_location(f"soutk_engine_{name}", ENGINES[name])
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        _loaded_engines[name] = module
+    return _loaded_engines[name]
+
+
+def read_headers(code):
+    """Read "// key: value" headers from the top of a workload"""
+    headers = {}
+    for line in code.splitlines():
+        line = line.strip()
+        if not line.startswith('//'):
+            break
+        key, sep, value = line[2:].partition(':')
+        if sep:
+            headers[key.strip().lower()] = value.strip()
+    return headers
+
+
+def expand_repeats(code, headers):
+    """Write out the lines after a "// repeated" comment "repeat" times, with {i} numbering each copy.
+    This is how workloads for engines without working loops avoid hand-unrolled copies."""
+    count = int(headers.get('repeat', 0))
+    if not count:
+        return code
+    setup, marker, template = code.partition("\n// repeated\n")
+    if not marker:
+        raise ValueError("A workload with a 'repeat' header needs a '// repeated' line before the lines to repeat")
+    return setup + "\n" + "".join(template.replace("{i}", str(i)) for i in range(1, count + 1))
+
+
+def load_workload(path):
+    """Read a workload file and return its headers and the program to run"""
+    code = Path(path).read_text(encoding='utf-8')
+    headers = read_headers(code)
+    return headers, expand_repeats(code, headers)
+
+
+@contextlib.contextmanager
+def sandbox():
+    """Run in a scratch directory holding the benchmark support modules, with output discarded"""
+    old_cwd = os.getcwd()
+    old_stdin = sys.stdin
+    with tempfile.TemporaryDirectory(prefix="soutk_bench_") as work_dir:
+        shutil.copytree(BENCHMARK_DIR / 'modules', Path(work_dir) / 'modules')
+        os.chdir(work_dir)
+        sys.stdin = io.StringIO("")
+        try:
+            with contextlib.redirect_stdout(io.StringIO()) as output:
+                yield output
+        finally:
+            sys.stdin = old_stdin
+            os.chdir(old_cwd)
+
+
+def run_once(engine, code, filename):
+    """Run a program once on a fresh interpreter and return its captured output"""
+    with sandbox() as output:
+        interpreter = engine.SoutkInterpreter()
+        interpreter.current_file = filename
+        interpreter.execute(code)
+    return output.getvalue()
+
+
+def time_once(engine, code, filename):
+    """Run a program once and return the wall time of execute()"""
+    with sandbox():
+        interpreter = engine.SoutkInterpreter()
+        interpreter.current_file = filename
+        start = time.perf_counter()
+        interpreter.execute(code)
+        return time.perf_counter() - start
+
+
+def peak_memory(engine, code, filename):
+    """Run a program once under tracemalloc and return the peak traced bytes"""
+    tracemalloc.start()
+    try:
+        run_once(engine, code, filename)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def percentile(values, fraction):
+    """Nearest-rank percentile"""
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(fraction * len(ordered)) - 1)]
+
+
+def measure(engine, code, filename, repeat=5, warmup=1, ops=None):
+    """Time a program and return min/median/p95 wall time, peak memory and ops/sec"""
+    for _ in range(warmup):
+        time_once(engine, code, filename)
+    times = [time_once(engine, code, filename) for _ in range(repeat)]
+    median = statistics.median(times)
+    return {
+        'runs': repeat,
+        'min': min(times),
+        'median': median,
+        'p95': percentile(times, 0.95),
+        'peak_memory': peak_memory(engine, code, filename),
+        'ops': ops,
+        'ops_per_sec': ops / median if ops and median > 0 else None
+    }
+
+
+def discover(filter_text=None):
+    """Return the benchmark workload files, optionally filtered by name"""
+    files = sorted(BENCHMARK_DIR.glob('*.stk'))
+    if filter_text:
+        files = [f for f in files if filter_text in f.stem]
+    return files
+
+
+def run_suite(files, repeat=5, warmup=1):
+    """Measure every workload and return the results document"""
+    results = {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'repeat': repeat,
+        'benchmarks': {}
+    }
+    for path in files:
+        headers, code = load_workload(path)
+        engine_name = headers.get('engine', 'main')
+        ops = int(headers['ops']) if 'ops' in headers else None
+        stats = measure(load_engine(engine_name), code, path.name, repeat, warmup, ops)
+        stats['engine'] = engine_name
+        results['benchmarks'][path.stem] = stats
+        print_row(path.stem, stats)
+    return results
+
+
+def print_header():
+    print(f"{'benchmark':<18} {'engine':<9} {'min ms':>9} {'median ms':>10} {'p95 ms':>9} "
+          f"{'peak KiB':>9} {'ops/sec':>11}")
+    print("-" * 80)
+
+
+def print_row(name, stats):
+    ops_per_sec = f"{stats['ops_per_sec']:>11.0f}" if stats['ops_per_sec'] else f"{'-':>11}"
+    print(f"{name:<18} {stats['engine']:<9} {stats['min'] * 1000:>9.2f} {stats['median'] * 1000:>10.2f} "
+          f"{stats['p95'] * 1000:>9.2f} {stats['peak_memory'] / 1024:>9.1f} {ops_per_sec}")
+
+
+def compare(results, baseline, threshold):
+    """Return a list of regressions (median time or peak memory) beyond threshold"""
+    regressions = []
+    for name, stats in results['benchmarks'].items():
+        base = baseline.get('benchmarks', {}).get(name)
+        if not base:
+            continue
+        for metric in ('median', 'peak_memory'):
+            if base.get(metric):
+                change = (stats[metric] - base[metric]) / base[metric]
+                if change > threshold:
+                    regressions.append((name, metric, base[metric], stats[metric], change))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the Soutk benchmark suite")
+    parser.add_argument("--repeat", type=int, default=5, help="timed runs per workload")
+    parser.add_argument("--warmup", type=int, default=1, help="untimed runs per workload")
+    parser.add_argument("--filter", help="only run workloads whose name contains this text")
+    parser.add_argument("--output", help="write results as JSON to this file")
+    parser.add_argument("--baseline", help="compare against results from this JSON file")
+    parser.add_argument("--threshold", type=float, default=0.10,
+                        help="allowed slowdown / memory growth against the baseline (0.10 = 10%%)")
+    options = parser.parse_args(argv)
+
+    print("⏱️ Soutk Benchmark Suite")
+    print("=" * 80)
+    print_header()
+    results = run_suite(discover(options.filter), options.repeat, options.warmup)
+
+    if options.output:
+        with open(options.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f"\n📁 Results written to {options.output}")
+
+    if options.baseline:
+        with open(options.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, options.threshold)
+        if regressions:
+            print(f"\n❌ {len(regressions)} regression(s) beyond {options.threshold:.0%}:")
+            for name, metric, old, new, change in regressions:
+                print(f"   {name} {metric}: {old:.6g} -> {new:.6g} (+{change:.1%})")
+            return 1
+        print(f"\n✅ No regressions beyond {options.threshold:.0%} against {options.baseline}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
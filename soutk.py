@@ -5,18 +5,38 @@ A magical programming language with unique syntax and powerful features.
 
 Usage:
     python soutk.py program.stk
+    python soutk.py --profile program.stk
+    python soutk.py --profile=sample --hz 1000 program.stk
+    python soutk.py --serve
+    python soutk.py --client program.stk
+    python soutk.py --batch tests/ --jobs 4
+    python soutk.py --async program.stk
+    python soutk.py --emit-python program.stk -o program.py
     python soutk.py --help
     python soutk.py --version
 """
 
 import sys
 import os
+import argparse
 from pathlib import Path
 
 # Add src directory to path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
 
 from soutk_interpreter import SoutkInterpreter
+from soutk_profiler import SoutkProfiler, SoutkSampler
+from soutk_runner import run_file
+import soutk_server
+import soutk_batch
+import soutk_async
+import soutk_compiler
+
+# Embedding API: soutk.compile(source).run(...) / .call("spell", ...)
+from soutk_api import compile, compile_file, Program, RunResult
+from soutk_interpreter import SoutkError, SoutkLimitError
+
+ADDRESS_SPACE_HEADROOM = 256 * 1024 ** 2  # address space allowed beyond --max-memory before allocations fail
 
 def print_help():
     """Print help information"""
@@ -29,6 +49,48 @@ Usage:
     python soutk.py --version        Show version information
     python soutk.py --examples       List available examples
 
+Profiling:
+    python soutk.py --profile <program.stk>      Print per-line and per-spell timings
+    python soutk.py --profile=sample <program.stk>
+        --hz <rate>                              Sample the call stack <rate> times per second (default 1000)
+        --profile-json <file>                    Also write the profile as JSON
+        --profile-collapsed <file>               Also write collapsed stacks for flame graphs
+
+Server:
+    python soutk.py --serve                      Keep a warm interpreter running on a Unix socket
+    python soutk.py --client <program.stk>       Run a program on the server (stdin is forwarded)
+        --socket <path>                          Socket path (default /tmp/soutk.sock)
+
+Async runtime:
+    python soutk.py --async <program.stk>        Run with listen() and sleep on an asyncio event loop
+    python soutk.py --serve-sessions <program.stk>
+                                                 Host one interactive session per socket connection
+        --socket <path>                          Socket path (default /tmp/soutk-sessions.sock)
+
+Limits (single runs, --async, --serve-sessions, --serve and --batch):
+    --max-steps <n>                              Stop after n executed statements
+    --max-depth <n>                              Stop when spell calls nest deeper than n
+    --max-memory <size>                          Stop when memory grows by more than size, e.g. 256M
+                                                 (not with --serve-sessions: sessions share one process)
+    --timeout <seconds>                          Stop a program that runs longer than this
+
+Compiling:
+    python soutk.py --emit-python <program.stk>  Write the program as a standalone Python module
+        -o <file>                                Output file (default: program.py next to the program)
+        --vendor-runtime                         Also copy the runtime it needs into soutk_lib/ next to it
+                                                 (otherwise set SOUTK_SRC to Soutk's src/ directory to run it)
+
+Performance:
+    --no-transpile                               Always interpret spells (hot numeric spells are
+                                                 normally compiled to Python after 50 calls)
+
+Batch:
+    python soutk.py --batch <dir|manifest>       Run every .stk in a directory (or listed in a manifest)
+        --jobs <n>                               Worker processes (default: CPU count)
+        --timeout <seconds>                      Stop a program that runs longer than this
+        --memory-limit <size>                    Address-space limit per program, e.g. 512M
+        --summary <file>                         Write per-program results as JSON
+
 Examples:
     python soutk.py examples/hello.stk
     python soutk.py examples/advanced_demo.stk
@@ -58,6 +120,73 @@ def list_examples():
     else:
         print("❌ Examples directory not found")
 
+def build_arg_parser():
+    """Build the command line parser (help text is printed by print_help)"""
+    parser = argparse.ArgumentParser(prog="soutk.py", add_help=False)
+    parser.add_argument("program", nargs="?")
+    parser.add_argument("--help", "-h", action="store_true")
+    parser.add_argument("--version", "-v", action="store_true")
+    parser.add_argument("--examples", action="store_true")
+    parser.add_argument("--profile", nargs="?", const="line")
+    parser.add_argument("--hz", type=int, default=1000)
+    parser.add_argument("--profile-json")
+    parser.add_argument("--profile-collapsed")
+    parser.add_argument("--serve", action="store_true")
+    parser.add_argument("--client", action="store_true")
+    parser.add_argument("--socket")
+    parser.add_argument("--async", dest="use_async", action="store_true")
+    parser.add_argument("--serve-sessions", action="store_true")
+    parser.add_argument("--batch")
+    parser.add_argument("--jobs", type=int)
+    parser.add_argument("--timeout", type=float)
+    parser.add_argument("--memory-limit")
+    parser.add_argument("--summary")
+    parser.add_argument("--max-steps", type=int)
+    parser.add_argument("--max-depth", type=int)
+    parser.add_argument("--max-memory")
+    parser.add_argument("--no-transpile", action="store_true")
+    parser.add_argument("--emit-python", action="store_true")
+    parser.add_argument("--vendor-runtime", action="store_true")
+    parser.add_argument("-o", "--output")
+    return parser
+
+def parse_options(argv):
+    """Parse command line options"""
+    parser = build_arg_parser()
+    options = parser.parse_args(argv)
+    
+    # "--profile program.stk" means line profiling of program.stk
+    if options.profile not in (None, "line", "sample"):
+        if options.program is not None:
+            parser.error(f"unknown profile mode '{options.profile}' (use line or sample)")
+        options.program = options.profile
+        options.profile = "line"
+    
+    # Sessions share one process, so there is no per-session memory figure to check
+    if options.serve_sessions and options.max_memory:
+        parser.error("--max-memory cannot be used with --serve-sessions")
+    return options
+
+def limit_options(options, include_timeout=True):
+    """Collect the resource limit options as SoutkInterpreter.set_limits arguments"""
+    limits = {
+        'max_steps': options.max_steps,
+        'max_depth': options.max_depth,
+        'max_memory': soutk_batch.parse_size(options.max_memory),
+        'timeout': options.timeout if include_timeout else None
+    }
+    return {name: value for name, value in limits.items() if value is not None}
+
+def report_profile(profiler, options):
+    """Print and export profiling results"""
+    print(profiler.report())
+    if options.profile_json:
+        profiler.write_json(options.profile_json)
+        print(f"📁 Profile written to {options.profile_json}")
+    if options.profile_collapsed:
+        profiler.write_collapsed(options.profile_collapsed)
+        print(f"📁 Collapsed stacks written to {options.profile_collapsed}")
+
 def main():
     """Main entry point"""
     if len(sys.argv) < 2:
@@ -65,47 +194,84 @@ def main():
         print("Use 'python soutk.py --help' for usage information")
         sys.exit(1)
     
-    arg = sys.argv[1]
+    options = parse_options(sys.argv[1:])
     
     # Handle command line options
-    if arg == "--help" or arg == "-h":
+    if options.help:
         print_help()
         return
-    elif arg == "--version" or arg == "-v":
+    elif options.version:
         print_version()
         return
-    elif arg == "--examples":
+    elif options.examples:
         list_examples()
         return
+    elif options.serve:
+        soutk_server.serve(options.socket or soutk_server.DEFAULT_SOCKET, limit_options(options))
+        return
+    elif options.batch:
+        # The batch runner enforces --timeout itself, so it also covers blocking statements
+        sys.exit(soutk_batch.main(options.batch, options.jobs, options.timeout,
+                                  options.memory_limit, options.summary,
+                                  limit_options(options, include_timeout=False)))
+    
+    if not options.program:
+        print("❌ Error: No program file specified")
+        print("Use 'python soutk.py --help' for usage information")
+        sys.exit(1)
+    
+    # Compile Soutk program to Python
+    if options.emit_python:
+        sys.exit(soutk_compiler.main(options.program, options.output, options.vendor_runtime))
+    
+    # Run Soutk program on the server
+    if options.client:
+        sys.exit(soutk_server.run_client(options.program, options.socket or soutk_server.DEFAULT_SOCKET))
+    
+    # Run Soutk program on the asyncio runtime
+    if options.use_async:
+        sys.exit(soutk_async.run_async(options.program, limit_options(options), not options.no_transpile))
+    elif options.serve_sessions:
+        sys.exit(soutk_async.run_session_server(options.program,
+                                                options.socket or soutk_async.DEFAULT_SESSION_SOCKET,
+                                                limit_options(options), not options.no_transpile))
     
     # Run Soutk program
-    filename = arg
+    filename = options.program
+    profiler = None
+    exit_code = 0
+    
+    # A single statement can allocate far past --max-memory before it is checked; the address
+    # space cap stops it regardless (with room for thread stacks and malloc arenas)
+    max_memory = limit_options(options).get('max_memory')
+    if max_memory:
+        soutk_batch.cap_address_space(max(4 * max_memory, max_memory + ADDRESS_SPACE_HEADROOM))
     
     try:
-        file_path = Path(filename)
-        if not file_path.exists():
-            print(f"❌ Error: File '{filename}' not found.")
-            sys.exit(1)
-        
-        with open(file_path, "r", encoding='utf-8') as f:
-            code = f.read()
-        
-        print(f"🚀 Running Soutk program: {filename}")
-        print("=" * 50)
-        
         interpreter = SoutkInterpreter()
-        interpreter.current_file = filename
-        interpreter.execute(code)
-        
-        print("=" * 50)
-        print("✅ Program completed successfully!")
+        if options.no_transpile:
+            interpreter.transpile_threshold = None
+        if options.profile == "sample":
+            profiler = SoutkSampler(hz=options.hz)
+            profiler.start()
+            try:
+                exit_code = run_file(filename, interpreter, limit_options(options))
+            finally:
+                profiler.stop()
+        else:
+            if options.profile or options.profile_json or options.profile_collapsed:
+                profiler = SoutkProfiler()
+                interpreter.profiler = profiler
+            exit_code = run_file(filename, interpreter, limit_options(options))
         
     except KeyboardInterrupt:
         print("\n⚠️ Program interrupted by user")
         sys.exit(1)
-    except Exception as e:
-        print(f"💥 Fatal error: {str(e)}")
-        sys.exit(1)
+    finally:
+        if profiler is not None:
+            report_profile(profiler, options)
+    
+    sys.exit(exit_code)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
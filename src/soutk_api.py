@@ -0,0 +1,150 @@
+"""
+SOUTK Embedding API - Run Soutk from Python
+Compile source once into a Program, then run it as often as needed or call
+its spells directly:
+
+    import soutk
+    prog = soutk.compile(source)
+    result = prog.run(inputs={'n': 10}, capture_output=True)
+    print(result.output, result.variables['total'])
+    print(prog.call("fib", 20))
+"""
+
+import io
+import re
+
+from soutk_interpreter import SoutkInterpreter, SoutkError, SoutkLimitError, SPELL_PATTERN
+from soutk_runner import load_program
+
+
+class RunResult:
+    """Outcome of one program run"""
+    def __init__(self, variables, data_structures, output, errors, value):
+        self.variables = variables
+        self.data_structures = data_structures
+        self.output = output      # captured output, or None when not captured
+        self.errors = errors      # (line number, message) for every reported error
+        self.value = value        # value of a top-level return, if any
+
+    @property
+    def ok(self):
+        return not self.errors
+
+    def __repr__(self):
+        return f"RunResult(ok={self.ok}, value={self.value!r}, variables={sorted(self.variables)})"
+
+
+class Program:
+    """A parsed Soutk program that can be run many times without re-parsing"""
+    def __init__(self, lines, filename="<string>", diagnostics=None):
+        self.lines = lines
+        self.filename = filename
+        self.spells = find_spells(lines, diagnostics)
+        self._spell_interpreter = None
+        self._spell_inputs = None
+
+    def new_interpreter(self, diagnostics=None):
+        interpreter = SoutkInterpreter()
+        interpreter.current_file = self.filename
+        # Error messages are reported through the result or exception, and the caller's stream if given
+        interpreter.error_output = diagnostics if diagnostics is not None else io.StringIO()
+        return interpreter
+
+    def run(self, inputs=None, capture_output=False, stdin=None, limits=None, diagnostics=None):
+        """Run the whole program on a fresh interpreter.
+        inputs pre-set variables; stdin (a string or list of lines) feeds listen();
+        limits is a dict such as {'max_steps': 10000, 'timeout': 2} (exceeding one raises SoutkLimitError);
+        error messages are written to diagnostics (a stream) besides being listed in RunResult.errors."""
+        interpreter = self.new_interpreter(diagnostics)
+        interpreter.variables.update(inputs or {})
+        if isinstance(stdin, (list, tuple)):
+            stdin = "\n".join(stdin) + "\n"
+        if stdin is not None:
+            interpreter.input = io.StringIO(stdin)
+        if capture_output:
+            interpreter.output = io.StringIO()
+
+        value = None
+        try:
+            if limits:
+                interpreter.set_limits(**limits)
+            signal = interpreter.execute_top_level(self.lines)
+            if signal is not None and signal.kind == 'return':
+                value = signal.value
+            interpreter.finish()
+        finally:
+            if interpreter.limits is not None:
+                interpreter.limits.stop()
+
+        return RunResult(
+            variables=dict(interpreter.variables),
+            data_structures=dict(interpreter.data_structures),
+            output=interpreter.output.getvalue() if capture_output else None,
+            errors=list(interpreter.errors),
+            value=value
+        )
+
+    def call(self, spell, *args, inputs=None, diagnostics=None):
+        """Call one spell with Python arguments and return its result.
+        The program's top-level statements are not run; inputs pre-set variables the spell can read.
+        Raises SoutkError when the spell reports an error (whose message also goes to diagnostics, if given)."""
+        if spell not in self.spells:
+            raise SoutkError(f"Spell '{spell}' not defined in {self.filename}")
+
+        interpreter = self._spell_interpreter
+        if interpreter is None:
+            # One warm interpreter per program, reused by every call
+            interpreter = self.new_interpreter()
+            for name, definition in self.spells.items():
+                interpreter.functions[name] = definition
+                interpreter.spell_refs[name] = interpreter.make_spell_ref(name)
+            self._spell_interpreter = interpreter
+
+        inputs = dict(inputs or {})
+        if inputs != self._spell_inputs:
+            # Cached results of pure spells only hold for the inputs they were computed with
+            for definition in interpreter.functions.values():
+                if definition.get('memo'):
+                    definition['memo'].clear()
+            self._spell_inputs = inputs
+        interpreter.variables = dict(inputs)
+        interpreter.data_structures = {}
+        interpreter.errors = []
+        interpreter.error_output = diagnostics if diagnostics is not None else io.StringIO()
+        try:
+            value = interpreter.invoke_spell(spell, list(args))
+        except (SoutkError, MemoryError):
+            raise
+        except Exception as e:
+            raise SoutkError(str(e))
+        if interpreter.errors:
+            lineno, message = interpreter.errors[0]
+            raise SoutkError(f"Line {lineno}: {message}")
+        return value
+
+
+def find_spells(lines, diagnostics=None):
+    """Collect the forge spell definitions of a parsed program without running it.
+    Errors such as impure pure spells are written to diagnostics (a stream), if given."""
+    helper = SoutkInterpreter()
+    helper.error_output = diagnostics if diagnostics is not None else io.StringIO()
+    spells = {}
+    i = 0
+    while i < len(lines):
+        spell_match = re.match(SPELL_PATTERN, lines[i].strip())
+        if spell_match:
+            spells[spell_match.group(2)] = helper.make_spell(spell_match, helper.parse_function_body(lines, i))
+            i = helper.find_function_end(lines, i)
+        else:
+            i += 1
+    return spells
+
+
+def compile(source, filename="<string>", diagnostics=None):
+    """Parse Soutk source code into a reusable Program"""
+    return Program(SoutkInterpreter().parse(source), filename, diagnostics)
+
+
+def compile_file(filename, diagnostics=None):
+    """Parse a .stk file into a reusable Program (parses are cached until the file changes)"""
+    return Program(load_program(filename), filename, diagnostics)
@@ -0,0 +1,189 @@
+"""
+SOUTK Async Runtime - asyncio event loop for interactive programs
+Each Soutk program runs as a session on its own worker thread. Its listen()
+and sleep wait on the event loop instead of blocking input() and time.sleep,
+so one process can host many interactive sessions at once. Timers declared
+with after/every fire while a session waits for input.
+"""
+
+import asyncio
+import os
+import queue
+import signal
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from soutk_interpreter import SoutkInterpreter
+from soutk_runner import load_program, execute_program
+
+DEFAULT_SESSION_SOCKET = "/tmp/soutk-sessions.sock"
+
+
+class SessionClosed(BaseException):
+    """Raised inside a session whose client went away (a BaseException so statements cannot catch it)"""
+
+
+class SessionOutput:
+    """File-like output of one session (its interpreter's output), handing text to the session's writer"""
+    def __init__(self, write):
+        self.write_text = write
+
+    def write(self, text):
+        self.write_text(text)
+        return len(text)
+
+    def flush(self):
+        pass
+
+
+class AsyncSession(SoutkInterpreter):
+    """Interpreter whose listen and sleep wait on the event loop"""
+    def __init__(self, loop, read_line, write, close_on_eof=False):
+        super().__init__()
+        self.loop = loop
+        self.read_line = read_line  # coroutine function returning a line, or None at end of input
+        self.output = SessionOutput(write)  # write is called from the session thread with output text
+        self.close_on_eof = close_on_eof
+        self.inbox = queue.Queue()
+        self.closed = threading.Event()
+
+    def read_input(self, prompt):
+        if prompt:
+            self.print(prompt, end="")
+        line = self.wait_for(asyncio.run_coroutine_threadsafe(self.read_line(), self.loop))
+        if line is None:
+            if self.close_on_eof:
+                raise SessionClosed()
+            raise EOFError()
+        return line.rstrip("\r\n")
+
+    def pause(self, seconds):
+        if self.closed.wait(seconds):
+            raise SessionClosed()
+
+    def wait_for(self, future):
+        """Wait for a future from the event loop, firing timers that come due meanwhile"""
+        future.add_done_callback(self.inbox.put)
+        while True:
+            if self.closed.is_set():
+                future.cancel()
+                raise SessionClosed()
+            timeout = max(0.0, self.timers[0][0] - time.monotonic()) if self.timers else 0.5
+            try:
+                done = self.inbox.get(timeout=min(timeout, 0.5))
+            except queue.Empty:
+                if self.timers and self.timers[0][0] <= time.monotonic():
+                    self.fire_next_timer()
+                continue
+            return done.result()
+
+    def close(self):
+        self.closed.set()
+
+
+async def run_session(program, read_line, write, filename="<session>", executor=None, close_on_eof=False,
+                      limits=None, transpile=True):
+    """Run a parsed program as a session and return its exit code.
+    read_line is a coroutine function returning the next input line (None at end of input);
+    write is called on the event loop with each piece of output.
+    limits is a dict of SoutkInterpreter.set_limits arguments, applied to this session alone."""
+    loop = asyncio.get_running_loop()
+    session = AsyncSession(loop, read_line, lambda text: loop.call_soon_threadsafe(write, text), close_on_eof)
+    if not transpile:
+        session.transpile_threshold = None
+
+    def body():
+        try:
+            if limits:
+                session.set_limits(**limits)
+            return execute_program(session, program, filename)
+        except SessionClosed:
+            return 1
+
+    try:
+        return await loop.run_in_executor(executor, body)
+    finally:
+        session.close()
+
+
+async def read_stdin_line():
+    line = await asyncio.get_running_loop().run_in_executor(None, sys.stdin.readline)
+    return line or None
+
+
+async def run_stdin_session(filename, limits=None, transpile=True):
+    """Run one program in the async runtime with this process's stdin and stdout"""
+    def write(text):
+        sys.stdout.write(text)
+        sys.stdout.flush()
+
+    return await run_session(load_program(filename), read_stdin_line, write, filename,
+                             limits=limits, transpile=transpile)
+
+
+def run_async(filename, limits=None, transpile=True):
+    """Command line entry point for soutk.py --async; returns the exit code"""
+    try:
+        load_program(filename)
+    except OSError:
+        print(f"❌ Error: File '{filename}' not found.")
+        return 1
+    return asyncio.run(run_stdin_session(filename, limits, transpile))
+
+
+async def serve_sessions(filename, socket_path=DEFAULT_SESSION_SOCKET, max_sessions=256, limits=None, transpile=True):
+    """Host interactive sessions of a program: every connection gets its own session.
+    limits apply to each session separately; max_memory is not supported, since sessions share one process."""
+    if limits and limits.get('max_memory') is not None:
+        raise ValueError("max_memory cannot be enforced per session")
+    executor = ThreadPoolExecutor(max_workers=max_sessions, thread_name_prefix="soutk-session")
+
+    async def handle(reader, writer):
+        async def read_line():
+            line = await reader.readline()
+            return line.decode('utf-8') if line else None
+
+        def write(text):
+            if not writer.is_closing():
+                writer.write(text.encode('utf-8'))
+
+        try:
+            await run_session(load_program(filename), read_line, write, filename, executor, close_on_eof=True,
+                              limits=limits, transpile=transpile)
+            await writer.drain()
+        except (ConnectionError, OSError):
+            pass
+        finally:
+            writer.close()
+
+    if os.path.exists(socket_path):
+        os.unlink(socket_path)
+    server = await asyncio.start_unix_server(handle, path=socket_path)
+    stopping = asyncio.Event()
+    if hasattr(signal, 'SIGTERM'):
+        asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, stopping.set)
+    print(f"🔮 Hosting sessions of {filename} on {socket_path}")
+    try:
+        async with server:
+            await stopping.wait()
+    finally:
+        executor.shutdown(wait=False)
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+
+
+def run_session_server(filename, socket_path=DEFAULT_SESSION_SOCKET, limits=None, transpile=True):
+    """Command line entry point for soutk.py --serve-sessions; returns the exit code"""
+    try:
+        load_program(filename)
+    except OSError:
+        print(f"❌ Error: File '{filename}' not found.")
+        return 1
+    try:
+        asyncio.run(serve_sessions(filename, socket_path, limits=limits, transpile=transpile))
+    except KeyboardInterrupt:
+        pass
+    print("🛑 Session server stopped")
+    return 0
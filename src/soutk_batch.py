@@ -0,0 +1,197 @@
+"""
+SOUTK Batch Runner - Run many Soutk programs across a process pool
+Each job captures its own output and runs under an optional wall-clock timeout
+and address-space limit. Results are collected in submission order and can be
+written as a JSON summary.
+"""
+
+import json
+import os
+import signal
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from soutk_runner import run_file, redirected_io
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+class JobTimeout(BaseException):
+    """Raised inside a job when its time is up (a BaseException so per-line error handling cannot swallow it)"""
+
+
+def parse_size(text):
+    """Parse a memory size such as 512M, 2G or 1048576 into bytes"""
+    if text is None:
+        return None
+    text = str(text).strip().upper()
+    units = {'K': 1024, 'M': 1024 ** 2, 'G': 1024 ** 3}
+    if text and text[-1] in units:
+        return int(float(text[:-1]) * units[text[-1]])
+    return int(text)
+
+
+def cap_address_space(extra):
+    """Cap this process's address space at its current size plus extra bytes.
+    A hard backstop for --max-memory, which is only checked between statements."""
+    if resource is None or not os.path.exists('/proc/self/statm'):
+        return
+    with open('/proc/self/statm') as f:
+        size = int(f.read().split()[0]) * resource.getpagesize()
+    soft, hard = resource.getrlimit(resource.RLIMIT_AS)
+    limit = size + extra
+    if hard != resource.RLIM_INFINITY:
+        limit = min(limit, hard)
+    resource.setrlimit(resource.RLIMIT_AS, (limit, hard))
+
+
+def collect_jobs(target):
+    """Turn a directory, a .stk file or a manifest (one program path per line) into program paths"""
+    path = Path(target)
+    if path.is_dir():
+        return [str(p) for p in sorted(path.glob('*.stk'))]
+    if path.suffix == '.stk':
+        return [str(path)]
+
+    programs = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if line and not line.startswith('#'):
+                programs.append(str(path.parent / line))
+    return programs
+
+
+def make_job(program, cwd=None, stdin="", timeout=None, memory_limit=None, limits=None):
+    """Describe one program run (limits: interpreter step/depth limits for set_limits)"""
+    return {
+        'program': program,
+        'cwd': cwd,
+        'stdin': stdin,
+        'timeout': timeout,
+        'memory_limit': memory_limit,
+        'limits': limits
+    }
+
+
+def raise_timeout(signum, frame):
+    raise JobTimeout()
+
+
+def run_job(job):
+    """Run one job in the current process and return its result (used by pool workers)"""
+    timeout = job.get('timeout')
+    memory_limit = job.get('memory_limit')
+    use_alarm = bool(timeout) and hasattr(signal, 'setitimer') and \
+        threading.current_thread() is threading.main_thread()
+
+    old_limit = None
+    if memory_limit and resource is not None:
+        old_limit = resource.getrlimit(resource.RLIMIT_AS)
+        resource.setrlimit(resource.RLIMIT_AS, (memory_limit, old_limit[1]))
+    if use_alarm:
+        old_handler = signal.signal(signal.SIGALRM, raise_timeout)
+        signal.setitimer(signal.ITIMER_REAL, timeout)
+
+    status = None
+    start = time.perf_counter()
+    try:
+        with redirected_io(job.get('stdin', ""), job.get('cwd')) as (stdout, stderr):
+            try:
+                exit_code = run_file(job['program'], limits=job.get('limits'))
+            except JobTimeout:
+                print(f"⏳ Timed out after {timeout}s")
+                exit_code = 1
+                status = 'timeout'
+            finally:
+                if use_alarm:
+                    signal.setitimer(signal.ITIMER_REAL, 0)
+    finally:
+        if use_alarm:
+            signal.signal(signal.SIGALRM, old_handler)
+        if old_limit is not None:
+            resource.setrlimit(resource.RLIMIT_AS, old_limit)
+
+    return {
+        'program': job['program'],
+        'status': status or ('passed' if exit_code == 0 else 'failed'),
+        'exit_code': exit_code,
+        'duration': time.perf_counter() - start,
+        'stdout': stdout.getvalue(),
+        'stderr': stderr.getvalue()
+    }
+
+
+def run_batch(jobs, workers=None, on_result=None):
+    """Run jobs across a process pool (or inline when workers is 1) and return results in order"""
+    results = []
+    if workers == 1 or len(jobs) <= 1:
+        for job in jobs:
+            result = run_job(job)
+            results.append(result)
+            if on_result:
+                on_result(result)
+        return results
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for result in pool.map(run_job, jobs):
+            results.append(result)
+            if on_result:
+                on_result(result)
+    return results
+
+
+def summarize(results, wall_time):
+    """Aggregate job results into the summary document"""
+    counts = {'passed': 0, 'failed': 0, 'timeout': 0}
+    for result in results:
+        counts[result['status']] += 1
+    return {
+        'jobs': len(results),
+        'passed': counts['passed'],
+        'failed': counts['failed'],
+        'timeouts': counts['timeout'],
+        'wall_time': wall_time,
+        'cpu_time': sum(result['duration'] for result in results),
+        'results': results
+    }
+
+
+def print_result(result):
+    icon = {'passed': '✅', 'failed': '❌', 'timeout': '⏳'}[result['status']]
+    print(f"{icon} {result['program']} ({result['duration'] * 1000:.1f} ms)")
+
+
+def main(target, workers=None, timeout=None, memory_limit=None, summary_file=None, limits=None):
+    """Command line entry point for soutk.py --batch; returns the exit code"""
+    try:
+        programs = collect_jobs(target)
+    except OSError as e:
+        print(f"❌ Error: {str(e)}")
+        return 1
+
+    jobs = [make_job(program, timeout=timeout, memory_limit=parse_size(memory_limit), limits=limits)
+            for program in programs]
+    workers = workers or os.cpu_count() or 1
+
+    print(f"📦 Running {len(jobs)} Soutk program(s) with {min(workers, max(len(jobs), 1))} worker(s)")
+    print("=" * 50)
+    start = time.perf_counter()
+    results = run_batch(jobs, workers, on_result=print_result)
+    summary = summarize(results, time.perf_counter() - start)
+
+    print("=" * 50)
+    print(f"📊 {summary['passed']} passed, {summary['failed']} failed, {summary['timeouts']} timed out "
+          f"in {summary['wall_time']:.2f}s")
+
+    if summary_file:
+        with open(summary_file, 'w', encoding='utf-8') as f:
+            json.dump(summary, f, indent=2)
+        print(f"📁 Summary written to {summary_file}")
+
+    return 0 if summary['passed'] == summary['jobs'] else 1
@@ -0,0 +1,375 @@
+"""
+SOUTK Compiler - Translate a Soutk program into a standalone Python module
+    python soutk.py --emit-python program.stk -o program.py
+Statement dispatch, loops, ifs, spells, returns, break and continue become
+Python code running on soutk_runtime; expressions are evaluated by the same
+code as in the interpreter, so the module behaves exactly like the script.
+Spells that only compute with numbers are also emitted as plain Python
+functions (see soutk_transpiler) and used from their first call.
+"""
+
+import re
+import shutil
+from pathlib import Path
+
+from soutk_interpreter import SoutkInterpreter, SPELL_PATTERN, SIDE_EFFECT_STATEMENTS
+from soutk_runner import load_program
+from soutk_transpiler import COMPARISON_OPS
+import soutk_transpiler
+
+# Modules a compiled program runs on, copied next to it by --vendor-runtime
+RUNTIME_MODULES = ('soutk_runtime', 'soutk_interpreter', 'soutk_runner', 'soutk_transpiler')
+VENDOR_DIR = 'soutk_lib'
+
+# Statements with a block that the runtime interprets as a whole
+BLOCK_STATEMENTS = {
+    'parallel': r'parallel\s+loop\s+(\w+)\s+from\s+(.+?)\s+to\s+(.+?)\s+into\s+(\w+)\s*\{?$',
+    'after': r'(after|every)\s+(.+?)\s+ms(?:\s+as\s+(\w+))?\s*\{?$',
+    'every': r'(after|every)\s+(.+?)\s+ms(?:\s+as\s+(\w+))?\s*\{?$'
+}
+
+HEADER = '''#!/usr/bin/env python3
+"""
+Compiled from {source} by soutk.py --emit-python. Do not edit.
+Run it with python; it needs the Soutk runtime (soutk_runtime and the modules it
+imports from the Soutk src/ directory), found in this order: the directory named
+by SOUTK_SRC, a soutk_lib/ directory next to this file (written by
+--vendor-runtime), or the import path.
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.environ.get("SOUTK_SRC", os.path.join(os.path.dirname(os.path.abspath(__file__)), "soutk_lib")))
+
+try:
+    from soutk_runtime import (SoutkRuntime, CompiledBlock, SourceLine as S, FlowSignal, BREAK_SIGNAL,
+                               CONTINUE_SIGNAL, FAILED, Deopt, NUMBER_TYPES, execute_program)
+except ImportError:
+    sys.exit("❌ Error: the Soutk runtime was not found. Set SOUTK_SRC to the Soutk src/ directory, "
+             "or compile with --vendor-runtime.")
+
+FILENAME = {filename!r}
+rt = SoutkRuntime(FILENAME)
+invoke = rt.invoke_spell
+'''
+
+FOOTER = '''
+
+if __name__ == "__main__":
+    sys.exit(execute_program(rt, PROGRAM, FILENAME))
+'''
+
+
+class ModuleEmitter:
+    """Builds the Python source of a compiled program"""
+    def __init__(self, lines, filename):
+        self.lines = lines
+        self.filename = filename
+        self.helper = SoutkInterpreter()  # only used for its block-finding methods
+        self.constants = []   # line lists referenced by the generated code
+        self.functions = []   # generated function sources
+        self.names = set()
+        self.temps = 0
+        self.natives = find_native_spells(lines)
+
+    def emit(self):
+        program_lines = self.constant(self.lines)
+        self.add_function("program", self.lines)
+        parts = [HEADER.format(source=Path(self.filename).name, filename=self.filename)]
+        if self.natives:
+            parts.append("\n# Numeric spells translated to plain Python\n")
+            parts.append(native_support(self.natives))
+            for name in sorted(self.natives):
+                function = self.natives[name]
+                parts.append("\n" + function.soutk_source)
+                parts.append(f"spell_{name}.plus_words = {sorted(function.plus_words)!r}\n")
+        parts.append("\n# Statement lines, for the runtime and for parallel loop workers\n")
+        parts.extend(f"{name} = {text}\n" for name, text in self.constants)
+        for function in self.functions:
+            parts.append("\n\n" + function)
+        parts.append(f"\n\nPROGRAM = CompiledBlock({program_lines}, program)\n")
+        parts.append(FOOTER)
+        return "".join(parts)
+
+    def constant(self, lines):
+        """Add a line list to the module and return its name"""
+        items = ", ".join(f"S({str(line)!r}, {getattr(line, 'lineno', 0)})" for line in lines)
+        name = f"LINES_{len(self.constants)}"
+        self.constants.append((name, f"[{items}]"))
+        return name
+
+    def function_name(self, base):
+        name = base
+        number = 1
+        while name in self.names:
+            number += 1
+            name = f"{base}_{number}"
+        self.names.add(name)
+        return name
+
+    def add_function(self, name, lines, doc=None):
+        """Generate a function that runs a block like SoutkInterpreter.execute_lines does"""
+        out = [f"def {name}():"]
+        if doc:
+            out.append(f"    {doc!r}")
+        self.block(lines, 1, out, in_loop=False)
+        self.functions.append("\n".join(out) + "\n")
+        return name
+
+    def new_temp(self, base):
+        self.temps += 1
+        return f"{base}_{self.temps}"
+
+    def block(self, lines, indent, out, in_loop):
+        """Emit the statements of a block, in the order SoutkInterpreter.execute_lines dispatches them"""
+        start = len(out)
+        pad = "    " * indent
+        i = 0
+        while i < len(lines):
+            lineno = getattr(lines[i], 'lineno', i + 1)
+            line = lines[i].strip()
+            words = line.split()
+            first_word = words[0].rstrip(';') if words else ""
+
+            # FORGE SPELL
+            spell_match = re.match(SPELL_PATTERN, line) if line.startswith(("forge spell", "pure")) else None
+            if spell_match:
+                func_name = spell_match.group(2)
+                body = self.helper.parse_function_body(lines, i)
+                body_function = self.add_function(self.function_name(f"body_{func_name}"), body,
+                                                  f"Body of spell {func_name} (line {lineno})")
+                native = f", spell_{func_name}" if func_name in self.natives else ""
+                out.append(f"{pad}rt.define({lineno}, {line!r}, {self.constant(body)}, {body_function}{native})")
+                i = self.helper.find_function_end(lines, i)
+                continue
+
+            # Data structures, files, sleep, timers and parallel loops are left to the interpreter
+            if first_word in SIDE_EFFECT_STATEMENTS and first_word != "chant":
+                end = i
+                pattern = BLOCK_STATEMENTS.get(first_word)
+                if pattern and line.startswith(first_word + " ") and re.match(pattern, line):
+                    _, end = self.helper.collect_block(lines, i)
+                out.append(f"{pad}rt.run_lines({self.constant(lines[i:end + 1])})")
+                i = end + 1
+                continue
+
+            if line.startswith("chant"):
+                to_print = line[6:].strip(" ;") if line.startswith("chant ") else line[5:].strip(" ;")
+                out.append(f"{pad}rt.chant({lineno}, {to_print!r})")
+
+            elif line.startswith("transform"):
+                transform_line = line[9:].strip()
+                if '=' in transform_line:
+                    var_name, expr = transform_line.split('=', 1)
+                    out.append(f"{pad}rt.assign({lineno}, {var_name.strip()!r}, {expr.strip(' ;')!r})")
+                else:
+                    out.append(f"{pad}rt.run_lines({self.constant([lines[i]])})")
+
+            elif line.startswith("invoke"):
+                invoke_match = re.match(r'invoke\s+(\w+)\s*\((.*?)\)', line)
+                if invoke_match:
+                    out.append(f"{pad}rt.invoke({lineno}, {invoke_match.group(1)!r}, {invoke_match.group(2)!r})")
+                else:
+                    out.append(f"{pad}rt.run_lines({self.constant([lines[i]])})")
+
+            elif line.startswith("loop"):
+                loop_match = re.match(r'loop\s+(\w+)\s+from\s+(.+?)\s+to\s+(.+?)\s*\{?$', line)
+                if loop_match:
+                    var_name, start_val, end_val = loop_match.groups()
+                    body, end = self.helper.collect_block(lines, i)
+                    loop_range = self.new_temp("loop_range")
+                    old_value = self.new_temp("old_value")
+                    out.append(f"{pad}{loop_range} = rt.loop_range({lineno}, {start_val!r}, {end_val!r})")
+                    out.append(f"{pad}if {loop_range} is FAILED:")
+                    self.run_rest(lines[i + 1:end + 1], indent + 1, out, in_loop)
+                    out.append(f"{pad}elif {loop_range} is not None:")
+                    out.append(f"{pad}    {old_value} = rt.variables.get({var_name!r})")
+                    out.append(f"{pad}    try:")
+                    out.append(f"{pad}        for loop_value in {loop_range}:")
+                    out.append(f"{pad}            rt.variables[{var_name!r}] = loop_value")
+                    self.block(body, indent + 3, out, in_loop=True)
+                    out.append(f"{pad}    finally:")
+                    out.append(f"{pad}        rt.restore({var_name!r}, {old_value})")
+                    i = end
+                else:
+                    out.append(f"{pad}rt.run_lines({self.constant([lines[i]])})")
+
+            elif line.startswith("foreach"):
+                foreach_match = re.match(r'foreach\s+(\w+)\s+in\s+(.+?)\s*\{?$', line)
+                if foreach_match:
+                    var_name, collection = foreach_match.groups()
+                    body, end = self.helper.collect_block(lines, i)
+                    items = self.new_temp("items")
+                    old_value = self.new_temp("old_value")
+                    out.append(f"{pad}{items} = rt.foreach_iter({lineno}, {collection!r})")
+                    out.append(f"{pad}if {items} is FAILED:")
+                    self.run_rest(lines[i + 1:end + 1], indent + 1, out, in_loop)
+                    out.append(f"{pad}else:")
+                    out.append(f"{pad}    {old_value} = rt.variables.get({var_name!r})")
+                    out.append(f"{pad}    try:")
+                    out.append(f"{pad}        for loop_value in {items}:")
+                    out.append(f"{pad}            rt.variables[{var_name!r}] = loop_value")
+                    self.block(body, indent + 3, out, in_loop=True)
+                    out.append(f"{pad}    finally:")
+                    out.append(f"{pad}        rt.restore({var_name!r}, {old_value})")
+                    i = end
+                else:
+                    out.append(f"{pad}rt.run_lines({self.constant([lines[i]])})")
+
+            elif line.startswith("if"):
+                if_match = re.match(r'if\s+(.+?)\s*\{?$', line)
+                if if_match:
+                    if_body, else_body, end = self.helper.collect_if_blocks(lines, i)
+                    condition = self.new_temp("condition")
+                    out.append(f"{pad}{condition} = rt.value({lineno}, {if_match.group(1)!r})")
+                    out.append(f"{pad}if {condition} is FAILED:")
+                    self.run_rest(lines[i + 1:end + 1], indent + 1, out, in_loop)
+                    out.append(f"{pad}elif {condition}:")
+                    self.block(if_body, indent + 1, out, in_loop)
+                    if else_body:
+                        out.append(f"{pad}else:")
+                        self.block(else_body, indent + 1, out, in_loop)
+                    i = end
+                else:
+                    out.append(f"{pad}rt.run_lines({self.constant([lines[i]])})")
+
+            elif line.startswith("while"):
+                while_match = re.match(r'while\s+(.+?)\s*\{?$', line)
+                if while_match:
+                    body, end = self.helper.collect_block(lines, i)
+                    condition = self.new_temp("condition")
+                    out.append(f"{pad}while True:")
+                    out.append(f"{pad}    {condition} = rt.value({lineno}, {while_match.group(1)!r})")
+                    out.append(f"{pad}    if {condition} is FAILED or not {condition}:")
+                    out.append(f"{pad}        break")
+                    self.block(body, indent + 1, out, in_loop=True)
+                    i = end
+                else:
+                    out.append(f"{pad}rt.run_lines({self.constant([lines[i]])})")
+
+            elif line.startswith("return"):
+                if line == "return" or line == "return;":
+                    out.append(f"{pad}return FlowSignal('return')")
+                else:
+                    signal = self.new_temp("signal")
+                    out.append(f"{pad}{signal} = rt.return_signal({lineno}, {line[6:].strip(' ;')!r})")
+                    out.append(f"{pad}if {signal} is not None:")
+                    out.append(f"{pad}    return {signal}")
+
+            elif line in ("break", "break;", "continue", "continue;"):
+                keyword = line.rstrip(';')
+                if in_loop:
+                    out.append(f"{pad}{keyword}")
+                else:
+                    out.append(f"{pad}return rt.outside_loop({lineno}, {keyword.upper()}_SIGNAL)")
+
+            elif '=' in line and not any(op in line for op in COMPARISON_OPS):
+                var_name, expr = line.split('=', 1)
+                out.append(f"{pad}rt.assign({lineno}, {var_name.strip()!r}, {expr.strip(' ;')!r})")
+
+            i += 1
+
+        if len(out) == start:
+            out.append(f"{pad}pass")
+
+    def run_rest(self, lines, indent, out, in_loop):
+        """A block header whose expression failed: the interpreter runs the lines after it as plain
+        statements, passing on a return, break or continue they produce"""
+        pad = "    " * indent
+        signal = self.new_temp("signal")
+        out.append(f"{pad}{signal} = rt.run_lines({self.constant(lines)})")
+        if in_loop:
+            out.append(f"{pad}if {signal} is BREAK_SIGNAL:")
+            out.append(f"{pad}    break")
+            out.append(f"{pad}if {signal} is CONTINUE_SIGNAL:")
+            out.append(f"{pad}    continue")
+        out.append(f"{pad}if {signal} is not None:")
+        out.append(f"{pad}    return {signal}")
+
+
+def collect_spells(helper, lines, definitions):
+    """Count every spell definition in a program, nested ones included"""
+    i = 0
+    while i < len(lines):
+        spell_match = re.match(SPELL_PATTERN, lines[i].strip())
+        if spell_match and lines[i].strip().startswith(("forge spell", "pure")):
+            body = helper.parse_function_body(lines, i)
+            definitions.setdefault(spell_match.group(2), []).append(helper.make_spell(spell_match, body))
+            collect_spells(helper, body, definitions)
+            i = helper.find_function_end(lines, i)
+        else:
+            i += 1
+    return definitions
+
+
+def find_native_spells(lines):
+    """Translate the spells that the transpiler accepts; returns name -> compiled function.
+    A spell defined more than once is never translated, nor is anything that calls it."""
+    helper = SoutkInterpreter()
+    helper.variables = {}
+    for name, definitions in collect_spells(helper, lines, {}).items():
+        if len(definitions) == 1:
+            helper.functions[name] = definitions[0]
+
+    natives = {}
+    for name in helper.functions:
+        if name not in helper.compiled_spells:
+            soutk_transpiler.compile_spell(helper, name)
+        if helper.compiled_spells.get(name) is not None:
+            natives[name] = helper.compiled_spells[name]
+    return natives
+
+
+def native_support(natives):
+    """Module-level names the translated spells use besides invoke, Deopt and NUMBER_TYPES"""
+    used = set()
+    for function in natives.values():
+        used |= set(re.findall(r'\bf_(\w+)\(', function.soutk_source))
+    lines = []
+    for name in sorted(used):
+        if name in ('int', 'float'):
+            lines.append(f"f_{name} = {name}\n")
+        else:
+            lines.append(f"f_{name} = rt.math_functions[{name!r}]\n")
+    return "".join(lines)
+
+
+def emit_python(lines, filename):
+    """Return the source of a Python module that runs the parsed program"""
+    source = ModuleEmitter(lines, filename).emit()
+    # Fail here rather than when the module runs (e.g. loops nested past Python's limit)
+    compile(source, filename, "exec")
+    return source
+
+
+def vendor_runtime(output):
+    """Copy the runtime modules into a soutk_lib/ directory next to a compiled module"""
+    target = Path(output).resolve().parent / VENDOR_DIR
+    target.mkdir(exist_ok=True)
+    src_dir = Path(__file__).resolve().parent
+    for name in RUNTIME_MODULES:
+        shutil.copyfile(src_dir / f"{name}.py", target / f"{name}.py")
+    return target
+
+
+def main(program, output=None, vendor=False):
+    """Command line entry point for soutk.py --emit-python; returns the exit code"""
+    if not Path(program).exists():
+        print(f"❌ Error: File '{program}' not found.")
+        return 1
+    output = output or str(Path(program).with_suffix('.py'))
+
+    try:
+        source = emit_python(load_program(program), program)
+        with open(output, 'w', encoding='utf-8') as f:
+            f.write(source)
+        runtime_dir = vendor_runtime(output) if vendor else None
+    except Exception as e:
+        print(f"💥 Fatal error: {str(e)}")
+        return 1
+
+    print(f"🐍 Compiled {program} to {output}")
+    if runtime_dir is not None:
+        print(f"📦 Runtime copied to {runtime_dir}")
+    return 0
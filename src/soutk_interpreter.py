@@ -5,16 +5,97 @@ Supports: chant, transform, forge spell, invoke, loop, and all data structures
 
 import re
 import os
+import io
+import sys
+import csv
 import json
 import math
+import time
+import heapq
+import bisect
+import tracemalloc
+import threading
 import random
+import sqlite3
+import keyword
+import copy
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from pathlib import Path
 
-class ReturnException(Exception):
-    """Custom exception for handling return statements"""
-    def __init__(self, value):
+try:
+    import soutk_transpiler
+except ImportError:  # interpreter loaded by file path without src/ on sys.path
+    soutk_transpiler = None
+
+class FlowSignal:
+    """Why a block stopped early: returned by execute() instead of raising, so that
+    return, break and continue cost a plain return through each enclosing block.
+    kind is 'return' (value is the result), 'tailcall' (value is (spell, arguments)),
+    'break' or 'continue'."""
+    __slots__ = ('kind', 'value')
+    
+    def __init__(self, kind, value=None):
+        self.kind = kind
         self.value = value
-        super().__init__(f"RETURN:{value}")
+    
+    def __repr__(self):
+        return f"FlowSignal({self.kind!r}, {self.value!r})"
+
+BREAK_SIGNAL = FlowSignal('break')
+CONTINUE_SIGNAL = FlowSignal('continue')
+
+# Returned by try_compiled_spell when a call has to be interpreted
+NOT_COMPILED = object()
+
+# Python frames used by one nested spell call (plus headroom for nested blocks)
+FRAMES_PER_CALL = 16
+
+# Deepest non-tail spell recursion allowed before the run is stopped. Before Python 3.11 every
+# Python call also takes C stack, so a high recursion limit crashes the process instead of failing cleanly.
+MAX_RECURSION_DEPTH = 150000 if sys.version_info >= (3, 11) else 1000
+
+# Deepest nesting of spells called from inside Python code (a spell reference called by eval() or a sort key).
+# Every such call re-enters the C evaluator, which the recursion limit does not guard even on 3.11.
+MAX_NATIVE_DEPTH = 2000
+
+# Spell definition header: [pure[(cache size)]] forge spell name(params)
+SPELL_PATTERN = r'(?:pure(?:\((\d+)\))?\s+)?forge spell\s+(\w+)\s*\((.*?)\)'
+
+# Results kept per pure spell unless the definition gives its own size
+MEMO_SIZE = 1024
+
+# Statements a pure spell may not contain (output, input, files, timers, data structures)
+SIDE_EFFECT_STATEMENTS = {
+    'chant', 'scroll', 'inscribe', 'append', 'await', 'sleep', 'after', 'every', 'cancel', 'parallel',
+    'forge', 'sort', 'push', 'pop', 'peek', 'showstack', 'enqueue', 'dequeue', 'front', 'showqueue',
+    'link', 'unlink', 'insertafter', 'traverse', 'heappush', 'heappop', 'heappeek', 'heapify', 'showheap',
+    'add', 'discard', 'union', 'intersect', 'difference', 'showset', 'bind', 'unbind', 'showgrimoire',
+    'pushall', 'enqueueall', 'linkall', 'bindall'
+}
+
+# Expressions whose value can change between calls with the same arguments (randomness, input, CSV files)
+IMPURE_EXPRESSION = re.compile(r'\b(?:random|listen)\s*\(|\bin\s+csv\s+"')
+
+# Names in a line, for finding the spells and data structures it uses
+IDENTIFIER = re.compile(r'[A-Za-z_]\w*')
+
+# Names a pure spell's reads are checked for (not after a '.', and not the exponent of a number like 1e5)
+VARIABLE_NAME = re.compile(r'(?<![\w.])[A-Za-z_]\w*')
+STRING_LITERAL = re.compile(r'"[^"]*"|\'[^\']*\'')
+
+# Words in a spell body that are not variables: statement keywords, literals and eval()'s builtins
+SPELL_WORDS = {
+    'transform', 'return', 'if', 'else', 'while', 'loop', 'from', 'to', 'foreach', 'in', 'invoke',
+    'break', 'continue', 'and', 'or', 'not', 'is', 'true', 'false', 'True', 'False', 'None',
+    'len', 'str', 'int', 'float'
+}
+
+# Tokens of an expression the integer fast path can evaluate natively
+INT_EXPRESSION_TOKEN = re.compile(r'\s*(?:(\d+)(?![\w.])|([A-Za-z_]\w*)|(==|!=|<=|>=|//|[-+*/%<>()]))')
+
+# Returned by compile_int_expression for expressions that always take the generic path
+GENERIC_EXPRESSION = object()
 
 class SoutkError(Exception):
     """Custom exception for Soutk error handling"""
@@ -22,17 +103,150 @@ class SoutkError(Exception):
         self.message = message
         super().__init__(message)
 
+class SoutkLimitError(SoutkError):
+    """Raised when a program exceeds one of its resource limits (kind: 'steps', 'time', 'memory' or 'depth')"""
+    def __init__(self, message, kind=None):
+        super().__init__(message)
+        self.kind = kind
+        self.args = (message, kind)  # so the kind survives the trip back from a parallel loop worker
+    
+    def __str__(self):
+        return self.message
+
+class SoutkModifiedError(SoutkError):
+    """Raised when a data structure changes while foreach is iterating over it"""
+
+# Errors that must stop the program instead of being reported per line
+FATAL_ERRORS = (MemoryError, SoutkLimitError)
+
+def current_rss():
+    """Resident set size of this process in bytes (peak RSS where the current value is unavailable)"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == 'darwin' else peak * 1024
+
+class SoutkLimits:
+    """Per-run resource limits, checked by the interpreter as it executes statements"""
+    MEMORY_CHECK_INTERVAL = 256    # statements between memory checks...
+    MEMORY_CHECK_SECONDS = 0.01    # ...or less, when statements are slow (e.g. each one copies a large value)
+    
+    def __init__(self, max_steps=None, max_depth=None, max_memory=None, timeout=None, memory_mode='rss'):
+        self.max_steps = max_steps
+        self.max_depth = max_depth
+        self.max_memory = max_memory
+        self.timeout = timeout
+        self.memory_mode = memory_mode
+        self.steps = 0
+        self.deadline = None
+        self.memory_base = 0
+        self.next_memory_check = 0
+        self.started_tracemalloc = False
+    
+    def start(self):
+        """Start counting steps, time and memory from now"""
+        self.steps = 0
+        self.deadline = time.monotonic() + self.timeout if self.timeout else None
+        if self.max_memory:
+            if self.memory_mode == 'tracemalloc':
+                if not tracemalloc.is_tracing():
+                    tracemalloc.start()
+                    self.started_tracemalloc = True
+                self.memory_base = tracemalloc.get_traced_memory()[0]
+            else:
+                self.memory_base = current_rss()
+    
+    def stop(self):
+        if self.started_tracemalloc:
+            tracemalloc.stop()
+            self.started_tracemalloc = False
+    
+    def memory_used(self):
+        if self.memory_mode == 'tracemalloc':
+            return tracemalloc.get_traced_memory()[0] - self.memory_base
+        return current_rss() - self.memory_base
+    
+    def check_step(self):
+        """Count one executed statement (or loop iteration) and enforce the limits"""
+        self.steps += 1
+        if self.max_steps is not None and self.steps > self.max_steps:
+            raise self.exceeded('steps')
+        if self.deadline is not None and time.monotonic() > self.deadline:
+            raise self.exceeded('time')
+        if self.max_memory is not None and (self.steps % self.MEMORY_CHECK_INTERVAL == 0
+                                            or time.monotonic() >= self.next_memory_check):
+            self.next_memory_check = time.monotonic() + self.MEMORY_CHECK_SECONDS
+            if self.memory_used() > self.max_memory:
+                raise self.exceeded('memory')
+    
+    def check_depth(self, depth):
+        if self.max_depth is not None and depth > self.max_depth:
+            raise self.exceeded('depth')
+    
+    def exceeded(self, kind):
+        """The error for going over one of these limits"""
+        message = {
+            'steps': f"Step limit exceeded ({self.max_steps} statements)",
+            'time': f"Time limit exceeded ({self.timeout}s)",
+            'memory': f"Memory limit exceeded ({self.max_memory} bytes)",
+            'depth': f"Call depth limit exceeded ({self.max_depth} nested spell calls)"
+        }[kind]
+        return SoutkLimitError(message, kind)
+    
+    def remaining(self, depth):
+        """set_limits arguments for a parallel loop worker: what is left of this run's budget"""
+        limits = {'max_memory': self.max_memory, 'memory_mode': self.memory_mode}
+        if self.max_steps is not None:
+            limits['max_steps'] = max(self.max_steps - self.steps, 0)
+        if self.max_depth is not None:
+            limits['max_depth'] = max(self.max_depth - depth, 0)
+        if self.deadline is not None:
+            # A timeout of 0 would mean no limit, so a spent budget becomes the smallest one
+            limits['timeout'] = max(self.deadline - time.monotonic(), 1e-6)
+        return limits
+
+class SourceLine(str):
+    """A line of Soutk source that remembers its line number in the original file"""
+    def __new__(cls, text, lineno):
+        line = super().__new__(cls, text)
+        line.lineno = lineno
+        return line
+    
+    def __reduce__(self):
+        return (SourceLine, (str(self), self.lineno))
+
+def iterate_unchanged(ds, items, kind):
+    """Yield from a data structure's own iterator (no copy), failing if the structure changes meanwhile"""
+    version = ds.version
+    for item in items:
+        yield item
+        if ds.version != version:
+            raise SoutkModifiedError(f"{kind} '{ds.name}' changed during foreach")
+
 class SoutkStack:
     """Stack data structure for Soutk"""
     def __init__(self, name):
         self.name = name
         self.items = []
+        self.version = 0  # bumped on every change, checked by foreach
     
     def push(self, item):
         self.items.append(item)
+        self.version += 1
+    
+    def push_all(self, items):
+        # The last item ends up on top, as if each had been pushed in turn
+        count = len(self.items)
+        self.items.extend(items)
+        self.version += 1
+        return len(self.items) - count
     
     def pop(self):
         if self.items:
+            self.version += 1
             return self.items.pop()
         return None
     
@@ -46,18 +260,35 @@ class SoutkStack:
     
     def show(self):
         return list(reversed(self.items))
+    
+    def __iter__(self):
+        # Top to bottom, like showstack
+        return iterate_unchanged(self, reversed(self.items), "Stack")
+    
+    def sort(self, key=None, reverse=False):
+        self.items.sort(key=key, reverse=reverse)
+        self.version += 1
 
 class SoutkQueue:
     """Queue data structure for Soutk"""
     def __init__(self, name):
         self.name = name
         self.items = []
+        self.version = 0
     
     def enqueue(self, item):
         self.items.append(item)
+        self.version += 1
+    
+    def enqueue_all(self, items):
+        count = len(self.items)
+        self.items.extend(items)
+        self.version += 1
+        return len(self.items) - count
     
     def dequeue(self):
         if self.items:
+            self.version += 1
             return self.items.pop(0)
         return None
     
@@ -71,6 +302,14 @@ class SoutkQueue:
     
     def show(self):
         return self.items.copy()
+    
+    def __iter__(self):
+        # Front to back
+        return iterate_unchanged(self, iter(self.items), "Queue")
+    
+    def sort(self, key=None, reverse=False):
+        self.items.sort(key=key, reverse=reverse)
+        self.version += 1
 
 class SoutkNode:
     """Node for linked list"""
@@ -83,9 +322,11 @@ class SoutkLinkedList:
     def __init__(self, name):
         self.name = name
         self.head = None
+        self.version = 0
     
     def link(self, data):
         new_node = SoutkNode(data)
+        self.version += 1
         if not self.head:
             self.head = new_node
         else:
@@ -94,18 +335,37 @@ class SoutkLinkedList:
                 current = current.next
             current.next = new_node
     
+    def link_all(self, items):
+        # Find the tail once, then chain the new nodes on
+        tail = self.head
+        while tail and tail.next:
+            tail = tail.next
+        count = 0
+        for data in items:
+            new_node = SoutkNode(data)
+            if tail is None:
+                self.head = new_node
+            else:
+                tail.next = new_node
+            tail = new_node
+            count += 1
+        self.version += 1
+        return count
+    
     def unlink(self, data):
         if not self.head:
             return False
         
         if self.head.data == data:
             self.head = self.head.next
+            self.version += 1
             return True
         
         current = self.head
         while current.next:
             if current.next.data == data:
                 current.next = current.next.next
+                self.version += 1
                 return True
             current = current.next
         return False
@@ -117,6 +377,7 @@ class SoutkLinkedList:
                 new_node = SoutkNode(new_data)
                 new_node.next = current.next
                 current.next = new_node
+                self.version += 1
                 return True
             current = current.next
         return False
@@ -129,19 +390,451 @@ class SoutkLinkedList:
             current = current.next
         return result
     
+    def nodes(self):
+        current = self.head
+        while current:
+            yield current.data
+            current = current.next
+    
+    def __iter__(self):
+        # Head to tail, walking the nodes
+        return iterate_unchanged(self, self.nodes(), "Linked list")
+    
+    def sort(self, key=None, reverse=False):
+        # Sort the values, then write them back into the existing nodes in order
+        items = sorted(self.traverse(), key=key, reverse=reverse)
+        current = self.head
+        for item in items:
+            current.data = item
+            current = current.next
+        self.version += 1
+    
     def is_empty(self):
         return self.head is None
 
+class SoutkHeapEntry:
+    """A heap slot: ordered by priority, then by insertion so equal priorities pop first-in first-out"""
+    __slots__ = ('priority', 'sequence', 'value', 'largest_first')
+    
+    def __init__(self, priority, sequence, value, largest_first):
+        self.priority = priority
+        self.sequence = sequence
+        self.value = value
+        self.largest_first = largest_first
+    
+    def __lt__(self, other):
+        if self.priority == other.priority:
+            return self.sequence < other.sequence
+        if self.largest_first:
+            return other.priority < self.priority
+        return self.priority < other.priority
+    
+    def __reduce__(self):
+        return (SoutkHeapEntry, (self.priority, self.sequence, self.value, self.largest_first))
+
+class SoutkHeap:
+    """Priority queue (binary heap) for Soutk: smallest first, or largest first for a max heap"""
+    def __init__(self, name, largest_first=False, key_spell=None):
+        self.name = name
+        self.largest_first = largest_first
+        self.key_spell = key_spell  # priorities come from this spell when set, else from the values
+        self.items = []
+        self.sequence = 0
+    
+    def entry(self, item, key=None):
+        self.sequence += 1
+        return SoutkHeapEntry(key(item) if key else item, self.sequence, item, self.largest_first)
+    
+    def push(self, item, key=None):
+        entry = self.entry(item, key)
+        try:
+            heapq.heappush(self.items, entry)
+        except TypeError:
+            # Incomparable priorities: take the new entry back out so the heap stays valid
+            self.items = [other for other in self.items if other is not entry]
+            heapq.heapify(self.items)
+            raise
+    
+    def pop(self):
+        if self.items:
+            return heapq.heappop(self.items).value
+        return None
+    
+    def peek(self):
+        if self.items:
+            return self.items[0].value
+        return None
+    
+    def heapify(self, items, key=None):
+        # Bulk load in O(n) instead of one push per item; the heap is only replaced once it is built
+        loaded = self.items + [self.entry(item, key) for item in items]
+        heapq.heapify(loaded)
+        self.items = loaded
+    
+    def is_empty(self):
+        return len(self.items) == 0
+    
+    def __len__(self):
+        return len(self.items)
+    
+    def show(self):
+        return [entry.value for entry in sorted(self.items)]
+
+class SoutkSet:
+    """Hash set for Soutk; remembers insertion order so it always shows the same way"""
+    def __init__(self, name):
+        self.name = name
+        self.items = {}  # value -> None, a dict keeps insertion order
+        self.version = 0
+    
+    def add(self, item):
+        if item in self.items:
+            return False
+        self.items[item] = None
+        self.version += 1
+        return True
+    
+    def discard(self, item):
+        if item in self.items:
+            del self.items[item]
+            self.version += 1
+            return True
+        return False
+    
+    def union(self, other):
+        self.items.update(dict.fromkeys(other))
+        self.version += 1
+    
+    def intersect(self, other):
+        other = other if isinstance(other, SoutkSet) else set(other)
+        self.items = dict.fromkeys(filter(other.__contains__, self.items))
+        self.version += 1
+    
+    def difference(self, other):
+        other = other if isinstance(other, SoutkSet) else set(other)
+        self.items = dict.fromkeys(filter(lambda item: item not in other, self.items))
+        self.version += 1
+    
+    def is_empty(self):
+        return len(self.items) == 0
+    
+    def __contains__(self, item):
+        try:
+            return item in self.items
+        except TypeError:
+            return False  # unhashable values such as arrays are never members
+    
+    def __iter__(self):
+        return iterate_unchanged(self, iter(self.items), "Set")
+    
+    def __len__(self):
+        return len(self.items)
+    
+    def show(self):
+        return list(self.items)
+
+class SoutkGrimoire:
+    """Dictionary/Map data structure for Soutk"""
+    def __init__(self, name):
+        self.name = name
+        self.data = {}
+        self.version = 0
+    
+    def bind(self, key, value):
+        self.data[key] = value
+        self.version += 1
+    
+    def bind_all(self, pairs):
+        pairs = dict(pairs)
+        self.data.update(pairs)
+        self.version += 1
+        return len(pairs)
+    
+    def unbind(self, key):
+        if key in self.data:
+            del self.data[key]
+            self.version += 1
+            return True
+        return False
+    
+    def lookup(self, key):
+        return self.data.get(key, None)
+    
+    def keys(self):
+        return list(self.data.keys())
+    
+    def values(self):
+        return list(self.data.values())
+    
+    def is_empty(self):
+        return len(self.data) == 0
+    
+    def __getitem__(self, key):
+        # g["key"] in an expression; a missing key reads as None
+        return self.lookup(key)
+    
+    def __contains__(self, key):
+        return key in self.data
+    
+    def __iter__(self):
+        # foreach goes over the keys
+        return iterate_unchanged(self, iter(self.data), "Grimoire")
+    
+    def __len__(self):
+        return len(self.data)
+    
+    def show(self):
+        return dict(self.data)
+
+class SoutkSortedGrimoire(SoutkGrimoire):
+    """Grimoire that keeps its keys sorted (bisect over a sorted key list) for range, floor and ceiling queries"""
+    def __init__(self, name):
+        super().__init__(name)
+        self.sorted_keys = []
+    
+    def bind(self, key, value):
+        if key not in self.data:
+            if not self.sorted_keys or self.sorted_keys[-1] < key:
+                self.sorted_keys.append(key)  # keys arriving in order (time series) skip the search
+            else:
+                bisect.insort(self.sorted_keys, key)
+        self.data[key] = value
+        self.version += 1
+    
+    def bind_all(self, pairs):
+        pairs = dict(pairs)
+        # Sort once for the whole batch; a key that cannot be ordered leaves the grimoire unchanged
+        self.sorted_keys = sorted(self.data.keys() | pairs.keys())
+        self.data.update(pairs)
+        self.version += 1
+        return len(pairs)
+    
+    def unbind(self, key):
+        if key in self.data:
+            del self.data[key]
+            del self.sorted_keys[bisect.bisect_left(self.sorted_keys, key)]
+            self.version += 1
+            return True
+        return False
+    
+    def __iter__(self):
+        return iterate_unchanged(self, iter(self.sorted_keys), "Grimoire")
+    
+    def keys(self):
+        return list(self.sorted_keys)
+    
+    def values(self):
+        return [self.data[key] for key in self.sorted_keys]
+    
+    def range(self, low, high):
+        """Keys from low to high inclusive, in order"""
+        return self.sorted_keys[bisect.bisect_left(self.sorted_keys, low):bisect.bisect_right(self.sorted_keys, high)]
+    
+    def floor(self, key):
+        """Largest key <= key, or None"""
+        index = bisect.bisect_right(self.sorted_keys, key)
+        return self.sorted_keys[index - 1] if index else None
+    
+    def ceiling(self, key):
+        """Smallest key >= key, or None"""
+        index = bisect.bisect_left(self.sorted_keys, key)
+        return self.sorted_keys[index] if index < len(self.sorted_keys) else None
+    
+    def min(self):
+        return self.sorted_keys[0] if self.sorted_keys else None
+    
+    def max(self):
+        return self.sorted_keys[-1] if self.sorted_keys else None
+    
+    def show(self):
+        return {key: self.data[key] for key in self.sorted_keys}
+
+class SoutkGrimoireStore:
+    """A sqlite file holding stored grimoires; writes are committed in batches"""
+    BATCH_SIZE = 1000  # writes per commit
+    
+    def __init__(self, path, read_only=False):
+        self.path = path
+        self.read_only = read_only
+        self.uncommitted = 0
+        if read_only:
+            self.db = sqlite3.connect(Path(path).resolve().as_uri() + "?mode=ro", uri=True)
+        else:
+            self.db = sqlite3.connect(path)
+            self.db.execute("CREATE TABLE IF NOT EXISTS grimoire (name TEXT NOT NULL, key TEXT NOT NULL, "
+                            "value TEXT NOT NULL, PRIMARY KEY (name, key))")
+    
+    def wrote(self, count=1):
+        self.uncommitted += count
+        if self.uncommitted >= self.BATCH_SIZE:
+            self.commit()
+    
+    def commit(self):
+        if self.uncommitted:
+            self.db.commit()
+            self.uncommitted = 0
+
+class SoutkStoredGrimoire(SoutkGrimoire):
+    """Grimoire kept in a sqlite file so it can outgrow memory and outlive the run.
+    Writes go straight through to the store; recently used entries are cached (LRU)."""
+    CACHE_SIZE = 4096
+    
+    def __init__(self, name, path, read_only=False):
+        self.name = name
+        self.path = path
+        self.store = open_grimoire_store(path, read_only)
+        self.cache = OrderedDict()  # stored key text -> value, least recently used first
+        self.version = 0
+    
+    @staticmethod
+    def stored_key(key):
+        # The JSON text the store keys on; 1, 1.0 and True are one key, as in a plain grimoire
+        hash(key)  # unhashable keys are refused, as in a plain grimoire
+        if isinstance(key, bool) or isinstance(key, float) and key.is_integer():
+            key = int(key)
+        return json.dumps(key)
+    
+    def remember(self, stored_key, value):
+        self.cache[stored_key] = value
+        self.cache.move_to_end(stored_key)
+        if len(self.cache) > self.CACHE_SIZE:
+            self.cache.popitem(last=False)
+    
+    def bind(self, key, value):
+        if self.store.read_only:
+            raise ValueError(f"Grimoire '{self.name}' cannot be changed inside a parallel loop")
+        stored_key = self.stored_key(key)
+        self.store.db.execute(
+            "INSERT INTO grimoire (name, key, value) VALUES (?, ?, ?) "
+            "ON CONFLICT (name, key) DO UPDATE SET value = excluded.value",
+            (self.name, stored_key, json.dumps(value)))
+        self.remember(stored_key, value)
+        self.version += 1
+        self.store.wrote()
+    
+    def bind_all(self, pairs):
+        if self.store.read_only:
+            raise ValueError(f"Grimoire '{self.name}' cannot be changed inside a parallel loop")
+        pairs = {self.stored_key(key): value for key, value in pairs}
+        self.store.db.executemany(
+            "INSERT INTO grimoire (name, key, value) VALUES (?, ?, ?) "
+            "ON CONFLICT (name, key) DO UPDATE SET value = excluded.value",
+            [(self.name, stored_key, json.dumps(value)) for stored_key, value in pairs.items()])
+        for stored_key in pairs.keys() & self.cache.keys():
+            self.cache[stored_key] = pairs[stored_key]
+        self.version += 1
+        self.store.wrote(len(pairs))
+        return len(pairs)
+    
+    def unbind(self, key):
+        if self.store.read_only:
+            raise ValueError(f"Grimoire '{self.name}' cannot be changed inside a parallel loop")
+        stored_key = self.stored_key(key)
+        self.cache.pop(stored_key, None)
+        cursor = self.store.db.execute("DELETE FROM grimoire WHERE name = ? AND key = ?",
+                                       (self.name, stored_key))
+        if cursor.rowcount == 0:
+            return False
+        self.version += 1
+        self.store.wrote()
+        return True
+    
+    def lookup(self, key):
+        stored_key = self.stored_key(key)
+        if stored_key in self.cache:
+            self.cache.move_to_end(stored_key)
+            return self.cache[stored_key]
+        row = self.store.db.execute("SELECT value FROM grimoire WHERE name = ? AND key = ?",
+                                    (self.name, stored_key)).fetchone()
+        if row is None:
+            return None
+        value = json.loads(row[0])
+        self.remember(stored_key, value)
+        return value
+    
+    def rows(self, columns):
+        # Insertion order, like a plain grimoire (an update keeps the entry's place)
+        return self.store.db.execute(f"SELECT {columns} FROM grimoire WHERE name = ? ORDER BY rowid", (self.name,))
+    
+    def keys(self):
+        return [json.loads(key) for key, in self.rows("key")]
+    
+    def values(self):
+        return [json.loads(value) for value, in self.rows("value")]
+    
+    def __iter__(self):
+        # Keys stream from the database cursor, so large stores are never loaded whole
+        return iterate_unchanged(self, (json.loads(key) for key, in self.rows("key")), "Grimoire")
+    
+    def is_empty(self):
+        return self.rows("1").fetchone() is None
+    
+    def __contains__(self, key):
+        try:
+            stored_key = self.stored_key(key)
+        except TypeError:
+            return False
+        if stored_key in self.cache:
+            return True
+        return self.store.db.execute("SELECT 1 FROM grimoire WHERE name = ? AND key = ?",
+                                     (self.name, stored_key)).fetchone() is not None
+    
+    def __len__(self):
+        return self.store.db.execute("SELECT COUNT(*) FROM grimoire WHERE name = ?", (self.name,)).fetchone()[0]
+    
+    def show(self):
+        return {json.loads(key): json.loads(value) for key, value in self.rows("key, value")}
+    
+    def __reduce__(self):
+        # Parallel loop workers read a committed snapshot through their own read-only connection
+        self.store.commit()
+        return (SoutkStoredGrimoire, (self.name, self.path, True))
+
+# Values a pure spell's cache must not key on, since they change in place
+DATA_STRUCTURE_TYPES = (SoutkStack, SoutkQueue, SoutkLinkedList, SoutkHeap, SoutkSet, SoutkGrimoire)
+
 class SoutkInterpreter:
     def __init__(self):
         self.variables = {}
         self.functions = {}
+        self.spell_refs = {}
         self.data_structures = {}
         self.line_number = 0
         self.current_file = None
+        self.profiler = None
+        self.output = None  # stream for chants and messages; None means sys.stdout
+        self.error_output = None  # stream for error messages; None means the output stream
+        self.input = None  # stream listen() reads from; None means sys.stdin
+        self.errors = []  # (line number, message) for every reported error
+        self.limits = None
+        self.call_depth = 0
+        self.native_depth = 0  # spell calls nested inside Python code (see MAX_NATIVE_DEPTH)
+        self.purity_epoch = 0  # bumped when spells or data structures are (re)defined; pure spells are rechecked
+        
+        # Hot spells transpiled to Python functions (None disables transpiling)
+        self.transpile_threshold = soutk_transpiler.TRANSPILE_THRESHOLD if soutk_transpiler else None
+        self.spell_calls = {}         # spell name -> calls so far, until it is transpiled
+        self.compiled_spells = {}     # spell name -> Python function, or None if it cannot be transpiled
+        self.deoptimized_spells = set()
+        self.compiled_depth = 0
+        
+        # Integer fast path: expression text -> (function, names, keywords), or GENERIC_EXPRESSION
+        self.int_expressions = {}
+        self.parallel_workers = None  # None = one per CPU; 1 runs parallel loops in-process
         
-        # Initialize math functions
+        # Background file I/O (scroll async / inscribe async / append async)
+        self.io_pool = None
+        self.pending_reads = {}    # variable name -> (future, filename, line number, spell call depth)
+        self.pending_writes = []   # (future, filename, message, line number)
+        self.file_futures = {}     # absolute path -> last operation queued on that file
+        
+        # Timers (after / every), fired while the program sleeps or waits
+        self.timers = []           # heap of [due, sequence, name, interval, body]
+        self.timer_sequence = 0
+        
+        # Initialize math and built-in functions
         self.init_math_functions()
+        self.init_builtin_functions()
     
     def init_math_functions(self):
         """Initialize built-in math functions"""
@@ -159,15 +852,106 @@ class SoutkInterpreter:
             'random': lambda a=0, b=1: random.uniform(a, b) if isinstance(a, float) or isinstance(b, float) else random.randint(a, b)
         }
     
+    def init_builtin_functions(self):
+        """Initialize built-in collection functions"""
+        self.builtin_functions = {
+            'sort': self.sort_values,
+            'sorted': self.sort_values,
+            'has': self.has_value,
+            'keys': self.grimoire_keys,
+            'values': self.grimoire_values,
+            'range': self.grimoire_range,
+            'floorkey': self.grimoire_floor,
+            'ceilkey': self.grimoire_ceiling,
+            'minkey': self.grimoire_min,
+            'maxkey': self.grimoire_max,
+            'parse_csv': self.parse_csv,
+            'parse_json': self.parse_json,
+            'to_json': self.to_json
+        }
+    
+    def resolve_spell_key(self, key):
+        """Turn a sort key (spell reference or spell name) into a Python key function"""
+        if key is None or callable(key):
+            return key
+        if isinstance(key, str) and key in self.functions:
+            return self.spell_refs[key]
+        raise ValueError(f"Sort key must be a spell, got '{key}'")
+    
+    def sort_values(self, values, key=None, reverse=False):
+        """Return a sorted copy of an array (stable Timsort, key spell called once per element)"""
+        if not isinstance(values, (list, tuple, str)):
+            raise ValueError(f"Cannot sort value of type {type(values).__name__}")
+        return sorted(values, key=self.resolve_spell_key(key), reverse=bool(reverse))
+    
+    def has_value(self, collection, value):
+        """has(set, value): membership test (O(1) for sets and grimoire keys; arrays and strings are scanned)"""
+        if isinstance(collection, (SoutkSet, SoutkGrimoire, dict, list, tuple, str)):
+            return value in collection
+        raise ValueError(f"has() needs a set, grimoire, array or string, got {type(collection).__name__}")
+    
+    def parse_csv(self, text, delimiter=","):
+        """parse_csv(text): rows of a CSV document as arrays of strings"""
+        if not isinstance(text, str):
+            raise ValueError(f"parse_csv() needs a string, got {type(text).__name__}")
+        return list(csv.reader(io.StringIO(text), delimiter=delimiter))
+    
+    def parse_json(self, text):
+        """parse_json(text): JSON arrays become arrays, objects become key/value maps"""
+        if not isinstance(text, str):
+            raise ValueError(f"parse_json() needs a string, got {type(text).__name__}")
+        try:
+            return json.loads(text)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Invalid JSON: {str(e)}")
+    
+    def to_json(self, value):
+        """to_json(value): JSON text for a value, data structures included"""
+        return json.dumps(value, default=json_value)
+    
+    def require_grimoire(self, grimoire, function, sorted_only=False):
+        """Check the first argument of a grimoire builtin"""
+        kind = SoutkSortedGrimoire if sorted_only else SoutkGrimoire
+        if not isinstance(grimoire, kind):
+            needed = "a sorted grimoire" if sorted_only else "a grimoire"
+            raise ValueError(f"{function}() needs {needed}, got {type(grimoire).__name__}")
+        return grimoire
+    
+    def grimoire_keys(self, grimoire):
+        if isinstance(grimoire, dict):  # a parsed JSON object
+            return list(grimoire.keys())
+        return self.require_grimoire(grimoire, "keys").keys()
+    
+    def grimoire_values(self, grimoire):
+        if isinstance(grimoire, dict):
+            return list(grimoire.values())
+        return self.require_grimoire(grimoire, "values").values()
+    
+    def grimoire_range(self, grimoire, low, high):
+        """range(g, lo, hi): keys of a sorted grimoire from lo to hi inclusive (O(log n) to find the ends)"""
+        return self.require_grimoire(grimoire, "range", sorted_only=True).range(low, high)
+    
+    def grimoire_floor(self, grimoire, key):
+        return self.require_grimoire(grimoire, "floorkey", sorted_only=True).floor(key)
+    
+    def grimoire_ceiling(self, grimoire, key):
+        return self.require_grimoire(grimoire, "ceilkey", sorted_only=True).ceiling(key)
+    
+    def grimoire_min(self, grimoire):
+        return self.require_grimoire(grimoire, "minkey", sorted_only=True).min()
+    
+    def grimoire_max(self, grimoire):
+        return self.require_grimoire(grimoire, "maxkey", sorted_only=True).max()
+    
     def listen(self, prompt=""):
         """Get input from user"""
         try:
             if prompt:
                 if isinstance(prompt, str) and prompt.startswith('"') and prompt.endswith('"'):
                     prompt = prompt[1:-1]
-                user_input = input(prompt)
+                user_input = self.read_input(prompt)
             else:
-                user_input = input()
+                user_input = self.read_input("")
             
             return user_input.strip()
         except KeyboardInterrupt:
@@ -175,14 +959,138 @@ class SoutkInterpreter:
         except EOFError:
             return ""
     
+    def read_input(self, prompt):
+        """Read one line of input (the async runtime reads from its session instead)"""
+        if self.input is None and self.output is None:
+            return input(prompt)
+        self.print(prompt, end="")
+        line = (self.input or sys.stdin).readline()
+        if not line:
+            raise EOFError()
+        return line[:-1] if line.endswith("\n") else line
+    
+    def pause(self, seconds):
+        """Block for a while (the async runtime makes this interruptible)"""
+        time.sleep(seconds)
+    
+    def sleep(self, seconds):
+        """Pause the program; timers that come due in the meantime fire"""
+        self.wait_until(time.monotonic() + seconds)
+    
+    def wait_until(self, deadline):
+        """Run due timers until the deadline passes"""
+        while True:
+            now = time.monotonic()
+            if self.timers and self.timers[0][0] <= min(now, deadline):
+                self.fire_next_timer()
+            elif now >= deadline:
+                return
+            else:
+                next_due = self.timers[0][0] if self.timers else deadline
+                self.pause(max(0.0, min(next_due, deadline) - now))
+    
+    def add_timer(self, delay, body, name=None, interval=None):
+        """Schedule a block to run after a delay (and then every interval, if given)"""
+        self.timer_sequence += 1
+        heapq.heappush(self.timers, [time.monotonic() + delay, self.timer_sequence, name, interval, body])
+    
+    def cancel_timer(self, name):
+        """Cancel every timer with this name; returns how many were cancelled"""
+        remaining = [timer for timer in self.timers if timer[2] != name]
+        cancelled = len(self.timers) - len(remaining)
+        heapq.heapify(remaining)
+        self.timers = remaining
+        return cancelled
+    
+    def fire_next_timer(self):
+        """Run the earliest timer's block (rescheduling repeating timers first)"""
+        due, sequence, name, interval, body = heapq.heappop(self.timers)
+        if interval is not None:
+            self.timer_sequence += 1
+            heapq.heappush(self.timers, [due + interval, self.timer_sequence, name, interval, body])
+        signal = self.execute_top_level(body)
+        if signal is not None and signal.kind == 'tailcall':
+            # The timer may fire inside a spell; its tail call still has to run
+            self.invoke_spell(*signal.value)
+    
+    def finish_timers(self):
+        """Stop repeating timers, then wait for the one-shot timers still pending"""
+        self.timers = [timer for timer in self.timers if timer[3] is None]
+        heapq.heapify(self.timers)
+        while self.timers:
+            self.wait_until(self.timers[0][0])
+            self.timers = [timer for timer in self.timers if timer[3] is None]
+            heapq.heapify(self.timers)
+    
+    def finish(self):
+        """Complete outstanding background work (timers, file I/O and grimoire stores) at the end of a program"""
+        self.finish_timers()
+        self.wait_for_io()
+        self.commit_stores()
+    
+    def commit_stores(self):
+        """Commit the writes still batched up in stored grimoires"""
+        for ds in self.data_structures.values():
+            if isinstance(ds, SoutkStoredGrimoire):
+                ds.store.commit()
+    
+    def set_limits(self, max_steps=None, max_depth=None, max_memory=None, timeout=None, memory_mode='rss'):
+        """Limit this run's executed statements, spell call depth, memory growth (bytes) and wall time (seconds)"""
+        if self.limits is not None:
+            self.limits.stop()
+        if max_steps is None and max_depth is None and max_memory is None and timeout is None:
+            self.limits = None
+            return None
+        self.limits = SoutkLimits(max_steps, max_depth, max_memory, timeout, memory_mode)
+        self.limits.start()
+        return self.limits
+    
+    def print(self, *values, end="\n"):
+        """Print to this interpreter's output (sessions and parallel loop workers each have their own)"""
+        print(*values, end=end, file=self.output or sys.stdout)
+    
     def error(self, message):
         """Display error with line number"""
-        print(f"❌ Line {self.line_number}: {message}")
+        self.errors.append((self.line_number, message))
+        print(f"❌ Line {self.line_number}: {message}", file=self.error_stream())
+    
+    def error_stream(self):
+        return self.error_output or self.output or sys.stdout
     
     def eval_expr(self, expr):
         """Evaluate expressions safely with all enhancements"""
         expr = expr.strip()
         
+        # Integer arithmetic on int variables runs natively, guarded by the variables' types
+        fast = self.int_expressions.get(expr)
+        if fast is None:
+            fast = self.int_expressions[expr] = self.compile_int_expression(expr)
+        if fast is not GENERIC_EXPRESSION and not self.pending_reads:
+            function, names, keywords = fast
+            variables = self.variables
+            values = []
+            for name in names:
+                value = variables.get(name)
+                if type(value) is not int:
+                    break
+                values.append(value)
+            else:
+                if not keywords or not any(keyword in variables for keyword in keywords):
+                    try:
+                        return function(*values)
+                    except FATAL_ERRORS:
+                        raise
+                    except Exception:
+                        pass  # e.g. division by zero: the generic path reports it
+            # A non-int flowed in: this expression is evaluated generically from now on
+            self.int_expressions[expr] = GENERIC_EXPRESSION
+        
+        # Reading a variable that is still being scrolled in the background joins it first
+        if self.pending_reads:
+            for var_name in list(self.pending_reads):
+                if re.search(rf'\b{var_name}\b', expr):
+                    self.await_read(var_name)
+        
         # Handle string literals
         string_literals = []
         def replace_strings(match):
@@ -200,10 +1108,22 @@ class SoutkInterpreter:
             try:
                 result = self.call_function(func_name, args_str)
                 return str(result)
+            except FATAL_ERRORS:
+                raise
             except Exception as e:
                 return f"ERROR_{str(e)}"
         
-        expr = re.sub(invoke_pattern, replace_invoke, expr)
+        if 'invoke' in expr:
+            # Spells are called from this loop rather than from a re.sub callback, so a
+            # recursive spell only nests Python frames (which do not use the C stack)
+            pieces = []
+            end = 0
+            for match in re.finditer(invoke_pattern, expr):
+                pieces.append(expr[end:match.start()])
+                pieces.append(replace_invoke(match))
+                end = match.end()
+            pieces.append(expr[end:])
+            expr = "".join(pieces)
         
         # Handle array access
         array_access_pattern = r'(\w+)\[([^\]]+)\]'
@@ -232,10 +1152,18 @@ class SoutkInterpreter:
                                 return str(result)
                         else:
                             return f"INDEX_ERROR_{index}"
-                    except:
+                    except FATAL_ERRORS:
+                        raise
+                    except Exception:
                         return f"EVAL_ERROR_{index_expr}"
+                elif isinstance(array, dict):
+                    # A parsed JSON object: left for eval, which indexes it by key
+                    return match.group(0)
                 else:
                     return f"NOT_ARRAY_{array_name}"
+            elif isinstance(self.data_structures.get(array_name), SoutkGrimoire):
+                # Left for eval, which looks the key up in the grimoire
+                return match.group(0)
             else:
                 return f"UNDEFINED_{array_name}"
         
@@ -245,6 +1173,9 @@ class SoutkInterpreter:
         for var_name, var_value in self.variables.items():
             pattern = rf'\b{re.escape(var_name)}\b'
             if re.search(pattern, expr):
+                if isinstance(var_value, str) and ('"' in var_value or '\n' in var_value or '\\' in var_value):
+                    # Cannot be spliced in as a literal (e.g. file contents); eval reads it from the namespace
+                    continue
                 if isinstance(var_value, str):
                     replacement = f'"{var_value}"'
                 elif isinstance(var_value, bool):
@@ -322,14 +1253,19 @@ class SoutkInterpreter:
                                 "true": True,
                                 "false": False
                             }
-                            safe_dict.update(self.variables)
+                            safe_dict.update(self.data_structures)
                             safe_dict.update(self.math_functions)
+                            safe_dict.update(self.builtin_functions)
+                            safe_dict.update(self.spell_refs)
+                            safe_dict.update(self.variables)  # a variable hides a builtin or spell of the same name
                             evaluated_val = eval(part, safe_dict)
                             if isinstance(evaluated_val, bool):
                                 result += "true" if evaluated_val else "false"
                             else:
                                 result += str(evaluated_val)
-                        except:
+                        except FATAL_ERRORS:
+                            raise
+                        except Exception:
                             result += str(part)
                 return result
         
@@ -346,8 +1282,11 @@ class SoutkInterpreter:
                 "True": True,
                 "False": False
             }
-            safe_dict.update(self.variables)
+            safe_dict.update(self.data_structures)
             safe_dict.update(self.math_functions)
+            safe_dict.update(self.builtin_functions)
+            safe_dict.update(self.spell_refs)
+            safe_dict.update(self.variables)  # a variable hides a builtin or spell of the same name
             result = eval(expr, safe_dict)
             
             if '+' in expr and ('"' in expr or "'" in expr):
@@ -355,6 +1294,8 @@ class SoutkInterpreter:
                     return "true" if result else "false"
             
             return result
+        except FATAL_ERRORS:
+            raise
         except Exception as e:
             if "can only concatenate str" in str(e) and "bool" in str(e):
                 fixed_expr = expr
@@ -371,16 +1312,68 @@ class SoutkInterpreter:
                         "True": True,
                         "False": False
                     }
-                    safe_dict.update(self.variables)
+                    safe_dict.update(self.data_structures)
                     safe_dict.update(self.math_functions)
+                    safe_dict.update(self.builtin_functions)
+                    safe_dict.update(self.spell_refs)
+                    safe_dict.update(self.variables)  # a variable hides a builtin or spell of the same name
                     return eval(fixed_expr, safe_dict)
-                except:
+                except FATAL_ERRORS:
+                    raise
+                except Exception:
                     pass
             
             raise ValueError(f"Invalid expression: {expr} - {str(e)}")
     
+    def compile_int_expression(self, expr):
+        """Compile an expression made only of names, integer literals and arithmetic or comparison
+        operators into a Python function of those names. The generic path substitutes each value
+        into the text, which gives the same result for ints except around ** (a substituted
+        negative number binds looser than it), so ** is left out."""
+        if '**' in expr:
+            return GENERIC_EXPRESSION
+        
+        names = []
+        keywords = []
+        depth = 0
+        position = 0
+        while position < len(expr):
+            token_match = INT_EXPRESSION_TOKEN.match(expr, position)
+            if not token_match or token_match.end() == position:
+                return GENERIC_EXPRESSION
+            position = token_match.end()
+            name = token_match.group(2)
+            if name is None:
+                # Parentheses must balance on their own, not just inside the lambda's
+                depth += {'(': 1, ')': -1}.get(token_match.group(3), 0)
+                if depth < 0:
+                    return GENERIC_EXPRESSION
+                continue
+            if name in ('and', 'or', 'not'):
+                if name not in keywords:
+                    keywords.append(name)
+            elif keyword.iskeyword(name):
+                return GENERIC_EXPRESSION
+            elif name not in names:
+                names.append(name)
+        
+        if depth != 0:
+            return GENERIC_EXPRESSION
+        if keywords and '+' in expr and not any(op in expr for op in ['==', '!=', '<=', '>=', '<', '>']):
+            # The generic path may join a + expression as strings when a bool variable name occurs in it
+            return GENERIC_EXPRESSION
+        try:
+            function = eval(f"lambda {', '.join(names)}: ({expr})", {"__builtins__": {}})
+        except SyntaxError:
+            return GENERIC_EXPRESSION
+        return function, tuple(names), tuple(keywords)
+    
     def call_function(self, func_name, args_str):
         """Call a function and return its result"""
+        return self.invoke_spell(func_name, self.eval_call_args(func_name, args_str))
+    
+    def eval_call_args(self, func_name, args_str):
+        """Split and evaluate the arguments of a spell call in the caller's scope"""
         if func_name not in self.functions:
             raise ValueError(f"Function '{func_name}' not defined")
         
@@ -415,32 +1408,579 @@ class SoutkInterpreter:
         if len(args) != len(func['params']):
             raise ValueError(f"Function '{func_name}' expects {len(func['params'])} arguments, got {len(args)}")
         
-        # Create temporary scope
-        old_variables = self.variables.copy()
-        return_value = None
+        # Evaluate all arguments in the caller's scope before binding any parameter
+        return [self.eval_expr(arg) for arg in args]
+    
+    def match_tail_call(self, expr):
+        """Return (spell name, argument text) when expr is exactly one spell call, else None"""
+        call_match = re.fullmatch(r'invoke\s+(\w+)\s*\((.*)\)', expr)
+        if not call_match or call_match.group(1) not in self.functions:
+            return None
+        
+        # Reject 'invoke f(a) + invoke g(b)', where the greedy match spans two calls
+        depth = 0
+        quote_char = None
+        for char in call_match.group(2):
+            if quote_char:
+                if char == quote_char:
+                    quote_char = None
+            elif char in ['"', "'"]:
+                quote_char = char
+            elif char == '(':
+                depth += 1
+            elif char == ')':
+                depth -= 1
+                if depth < 0:
+                    return None
+        return call_match.groups() if depth == 0 else None
+    
+    def ensure_stack_room(self):
+        """Raise Python's recursion limit as spell calls nest deeper"""
+        if self.call_depth > MAX_RECURSION_DEPTH:
+            raise SoutkLimitError(f"Recursion too deep ({MAX_RECURSION_DEPTH} nested spell calls)")
+        needed = (self.call_depth + 64) * FRAMES_PER_CALL
+        if needed > sys.getrecursionlimit():
+            sys.setrecursionlimit(min(needed * 2, (MAX_RECURSION_DEPTH + 64) * FRAMES_PER_CALL))
+    
+    def invoke_spell(self, func_name, arg_values):
+        """Call a function with already-evaluated argument values and return its result"""
+        if func_name not in self.functions:
+            raise ValueError(f"Function '{func_name}' not defined")
+        
+        func = self.functions[func_name]
+        
+        if len(arg_values) != len(func['params']):
+            raise ValueError(f"Function '{func_name}' expects {len(func['params'])} arguments, got {len(arg_values)}")
+        
+        profiler = self.profiler
+        
+        # Pure spells answer repeated arguments from their cache
+        memo = func.get('memo')
+        memo_key = None
+        if memo is not None and func['checked'] != self.purity_epoch:
+            memo = self.check_purity(func_name, func)
+        if memo is not None and any(isinstance(value, DATA_STRUCTURE_TYPES) for value in arg_values):
+            memo = None  # a data structure can change between calls
+        if memo is not None:
+            memo_size = func['memo_size']
+            memo_key = tuple(arg_values)
+            try:
+                if memo_key in memo:
+                    memo.move_to_end(memo_key)
+                    func['hits'] += 1
+                    if profiler is not None:
+                        profiler.record_memo(func_name, True)
+                    return memo[memo_key]
+            except TypeError:
+                memo = None  # unhashable argument such as an array
+            else:
+                func['misses'] += 1
+                if profiler is not None:
+                    profiler.record_memo(func_name, False)
+        
+        if self.transpile_threshold is not None and profiler is None and self.limits is None:
+            return_value = self.try_compiled_spell(func_name, arg_values)
+            if return_value is not NOT_COMPILED:
+                if memo is not None:
+                    memo[memo_key] = return_value
+                    if len(memo) > memo_size:
+                        memo.popitem(last=False)
+                return return_value
+        
+        # Create temporary scope
+        old_variables = self.variables.copy()
+        return_value = None
+        
+        if profiler is not None:
+            profiler.enter_spell(func_name)
+        
+        self.call_depth += 1
+        try:
+            if self.limits is not None:
+                self.limits.check_depth(self.call_depth)
+            if self.call_depth > 64:
+                self.ensure_stack_room()
+            
+            while True:
+                # Set parameters
+                for param, value in zip(func['params'], arg_values):
+                    self.variables[param] = value
+                
+                # Execute function body and capture return value
+                signal = self.execute(func['body'])
+                if signal is None:
+                    break
+                if signal.kind == 'tailcall':
+                    # 'return invoke spell(...)': reuse this call instead of nesting a new one
+                    func_name, arg_values = signal.value
+                    func = self.functions[func_name]
+                    if profiler is not None:
+                        profiler.exit_spell()
+                        profiler.enter_spell(func_name)
+                    elif self.transpile_threshold is not None and self.limits is None:
+                        # A tail call counts as a call, so a long tail-recursive run gets transpiled too
+                        return_value = self.try_compiled_spell(func_name, arg_values)
+                        if return_value is not NOT_COMPILED:
+                            break
+                        return_value = None
+                    continue
+                if signal.kind == 'return':
+                    return_value = signal.value
+                else:
+                    self.error(f"'{signal.kind}' outside of a loop in spell '{func_name}'")
+                break
+        finally:
+            # A background scroll started in this spell lands in the spell's variables, not the caller's
+            for var_name in [var_name for var_name, read in self.pending_reads.items() if read[3] >= self.call_depth]:
+                self.await_read(var_name)
+            # Restore original variables
+            self.call_depth -= 1
+            self.variables = old_variables
+            if profiler is not None:
+                profiler.exit_spell()
+        
+        return_value = return_value if return_value is not None else 0
+        if memo is not None:
+            memo[memo_key] = return_value
+            if len(memo) > memo_size:
+                memo.popitem(last=False)
+        return return_value
+    
+    def try_compiled_spell(self, func_name, arg_values):
+        """Run a call through the spell's transpiled Python function, transpiling it once it is hot.
+        Returns NOT_COMPILED when the call has to be interpreted."""
+        compiled = self.compiled_spells.get(func_name, NOT_COMPILED)
+        if compiled is NOT_COMPILED:
+            calls = self.spell_calls.get(func_name, 0) + 1
+            self.spell_calls[func_name] = calls
+            if calls < self.transpile_threshold:
+                return NOT_COMPILED
+            compiled = soutk_transpiler.compile_spell(self, func_name)
+        if compiled is None:
+            return NOT_COMPILED
+        
+        # Generated code is specialised for numeric arguments
+        for value in arg_values:
+            if type(value) is not int and type(value) is not float:
+                return NOT_COMPILED
+        if self.compiled_depth == 0 and compiled.plus_words:
+            # A bool variable in the caller's scope can turn + into string joining
+            for var_name, var_value in self.variables.items():
+                if type(var_value) is bool and any(var_name in word for word in compiled.plus_words):
+                    return NOT_COMPILED
+        
+        self.call_depth += 1
+        self.compiled_depth += 1
+        try:
+            if self.call_depth > 64:
+                self.ensure_stack_room()
+            result = compiled(*arg_values)
+        except FATAL_ERRORS:
+            raise
+        except Exception:
+            # Deoptimise: this call and all later ones are interpreted
+            self.compiled_spells[func_name] = None
+            self.deoptimized_spells.add(func_name)
+            return NOT_COMPILED
+        finally:
+            self.call_depth -= 1
+            self.compiled_depth -= 1
+        return result
+    
+    def bulk_items(self, source_expr):
+        """Values for pushall, enqueueall, linkall and bindall: an array, a data structure,
+        a range (start to end) or a string such as scrolled file contents (one item per line)"""
+        source_expr = source_expr.strip()
+        range_match = re.match(r'([^"\']+?)\s+to\s+([^"\']+)$', source_expr)
+        if range_match:
+            start = self.eval_expr(range_match.group(1))
+            end = self.eval_expr(range_match.group(2))
+            return range(int(start), int(end) + 1)
+        
+        if source_expr in self.variables:
+            source = self.variables[source_expr]  # no round trip of a large array through eval
+        elif source_expr in self.data_structures:
+            source = self.data_structures[source_expr]
+        else:
+            source = self.eval_expr(source_expr)
+        
+        if isinstance(source, str):
+            return source.splitlines()
+        if isinstance(source, SoutkGrimoire):
+            return source.show().items()
+        if isinstance(source, dict):
+            return source.items()
+        if isinstance(source, (SoutkStack, SoutkQueue, SoutkLinkedList, SoutkSet)):
+            return list(source)  # a copy, so a structure can be loaded from itself
+        if isinstance(source, SoutkHeap):
+            return source.show()
+        if isinstance(source, (list, tuple, range)):
+            return source
+        raise ValueError(f"Cannot load items from a value of type {type(source).__name__}")
+    
+    def bulk_pairs(self, items):
+        """Check that bindall was given [key, value] pairs"""
+        for pair in items:
+            if not isinstance(pair, (list, tuple)) or len(pair) != 2:
+                raise ValueError(f"bindall needs [key, value] pairs, got {pair!r}")
+            yield pair
+    
+    def foreach_items(self, collection_expr):
+        """Iterator for foreach: data structures iterate in place, arrays and strings directly"""
+        collection_expr = collection_expr.strip()
+        csv_match = re.match(r'csv\s+"([^"]+)"$', collection_expr)
+        if csv_match:
+            # Rows are read and parsed one at a time, so a large file is never loaded whole
+            filename = csv_match.group(1)
+            self.wait_for_file(filename)
+            try:
+                return stream_csv(open(filename, 'r', encoding='utf-8', newline=''))
+            except FileNotFoundError:
+                raise ValueError(f"File '{filename}' not found")
+        
+        if collection_expr in self.data_structures and collection_expr not in self.variables:
+            collection = self.data_structures[collection_expr]
+        else:
+            collection = self.eval_expr(collection_expr)
+        
+        if isinstance(collection, SoutkHeap):
+            raise ValueError(f"Cannot foreach over heap '{collection.name}', use heappop to read it in order")
+        if isinstance(collection, (SoutkStack, SoutkQueue, SoutkLinkedList, SoutkGrimoire, SoutkSet,
+                                   dict, list, tuple, str)):
+            return iter(collection)
+        raise ValueError(f"Cannot foreach over a value of type {type(collection).__name__}")
+    
+    def run_parallel_loop(self, var_name, start, end, body):
+        """Run loop iterations in worker processes and return the per-iteration results in order"""
+        values = list(range(start, end + 1))
+        if not values:
+            return []
+        
+        workers = self.parallel_workers or os.cpu_count() or 1
+        state = {
+            'variables': self.variables,
+            'functions': self.functions,
+            'data_structures': self.data_structures,
+            'current_file': self.current_file,
+            'limits': self.limits.remaining(self.call_depth) if self.limits is not None else None
+        }
+        
+        # Contiguous chunks, a few per worker so uneven iterations balance out
+        chunk_size = max(1, -(-len(values) // (workers * 4)))
+        chunks = [values[k:k + chunk_size] for k in range(0, len(values), chunk_size)]
+        
+        if workers == 1 or len(chunks) == 1:
+            # Same snapshot semantics as the workers: writes never reach this interpreter.
+            # Chunks run one after another, so each gets the budget the previous ones left.
+            outcomes = []
+            for chunk in chunks:
+                outcome = self.run_limited(run_parallel_chunk, copy.deepcopy(state), var_name, body, chunk)
+                if self.limits is not None:
+                    self.limits.steps += outcome[2]
+                    state['limits'] = self.limits.remaining(self.call_depth)
+                outcomes.append(outcome[:2] + (0,))
+        else:
+            pool = get_parallel_pool(workers)
+            outcomes = self.run_limited(list, pool.map(run_parallel_chunk, [state] * len(chunks),
+                                                       [var_name] * len(chunks), [body] * len(chunks), chunks))
+        
+        results = []
+        for chunk_results, output, steps in outcomes:
+            if output:
+                self.print(output, end="")
+            results.extend(chunk_results)
+            if self.limits is not None:
+                self.limits.steps += steps
+        return results
+    
+    def run_limited(self, function, *args):
+        """Run parallel loop work; a worker that runs out of this run's budget fails the whole loop
+        with the error for the run's own limit (not the share the worker was given)"""
+        try:
+            return function(*args)
+        except SoutkLimitError as e:
+            if self.limits is not None and e.kind is not None:
+                raise self.limits.exceeded(e.kind) from None
+            raise
+    
+    def make_spell(self, spell_match, body):
+        """Build a spell definition from a SPELL_PATTERN match and its body"""
+        memo_size, func_name, params_str = spell_match.groups()
+        params_str = params_str.strip()
+        func = {
+            'params': [param.strip() for param in params_str.split(',')] if params_str else [],
+            'body': body
+        }
+        
+        if spell_match.group(0).startswith("pure"):
+            found = self.find_impure_line(func['params'], body)
+            if found is not None:
+                self.error(f"Spell '{func_name}' cannot be pure: '{found[0]}' {found[1]}")
+            else:
+                # Results keyed by argument tuple, least recently used first
+                func['memo'] = OrderedDict()
+                func['memo_size'] = int(memo_size) if memo_size else MEMO_SIZE
+                func['hits'] = 0
+                func['misses'] = 0
+                func['checked'] = None
+        return func
+    
+    def check_purity(self, func_name, func):
+        """Check a pure spell and every spell it can call before its cache is used.
+        Returns the cache, or None after reporting the impure line and dropping the cache."""
+        found = self.find_impurity(func_name)
+        if found is None:
+            func['checked'] = self.purity_epoch
+            return func['memo']
+        spell_name, impure_line, reason = found
+        where = "" if spell_name == func_name else f" in spell '{spell_name}'"
+        self.error(f"Spell '{func_name}' cannot be pure: '{impure_line}'{where} {reason}")
+        func['memo'] = None
+        return None
+    
+    def find_impurity(self, func_name, seen=None):
+        """Return (spell, line, reason) for the first impure line of a spell or of any spell it can call, or None"""
+        seen = set() if seen is None else seen
+        seen.add(func_name)
+        func = self.functions[func_name]
+        body = func['body']
+        found = self.find_impure_line(func['params'], body)
+        if found is not None:
+            return (func_name,) + found
+        for line in body:
+            for name in IDENTIFIER.findall(line):
+                if name in self.functions and name not in seen:
+                    found = self.find_impurity(name, seen)
+                    if found is not None:
+                        return found
+        return None
+    
+    def define_spell(self, spell_match, body):
+        """Define (or redefine) a spell from a SPELL_PATTERN match and its body"""
+        func_name = spell_match.group(2)
+        if func_name in self.functions:
+            # Pure spells that call this one may have cached results of the old definition
+            for func in self.functions.values():
+                if func.get('memo'):
+                    func['memo'].clear()
+        self.purity_epoch += 1
+        if func_name in self.functions and self.compiled_spells:
+            # Transpiled spells may have been built against the old definition
+            self.compiled_spells.clear()
+            self.deoptimized_spells.clear()
+        elif None in self.compiled_spells.values():
+            # Spells that failed to transpile may have been calling this one before it existed
+            for spell_name in [spell_name for spell_name, compiled in self.compiled_spells.items()
+                               if compiled is None and spell_name not in self.deoptimized_spells]:
+                del self.compiled_spells[spell_name]
+        self.functions[func_name] = self.make_spell(spell_match, body)
+        self.spell_refs[func_name] = self.make_spell_ref(func_name)
+    
+    def find_impure_line(self, params, body):
+        """Return (line, reason) for the first line that keeps a spell body from being pure, or None"""
+        impure_line = self.find_side_effect(body, reads=True)
+        if impure_line is not None:
+            return impure_line, "has side effects"
+        found = self.find_free_variable(params, body)
+        if found is not None:
+            return found[0], f"reads '{found[1]}', which is not a parameter or local of the spell"
+        return None
+    
+    def find_free_variable(self, params, body):
+        """Return (line, name) for the first read of a variable a spell body neither receives nor sets
+        before the read. Scoping is dynamic, so such a read sees the caller's variables."""
+        local = set(params)
+        for line in body:
+            line = line.strip()
+            text = STRING_LITERAL.sub('""', line)
+            target = None
+            header_match = re.match(r'(?:loop|foreach)\s+(\w+)\s', text)
+            assign_match = re.match(r'(?:transform\s+)?(\w+)\s*=(?!=)', text)
+            if header_match:
+                local.add(header_match.group(1))
+            elif assign_match:
+                target = assign_match.group(1)
+                text = text[assign_match.end():]
+            for name_match in VARIABLE_NAME.finditer(text):
+                name = name_match.group(0)
+                if name in local or name in SPELL_WORDS or name in self.functions \
+                        or name in self.math_functions or name in self.builtin_functions:
+                    continue
+                rest = text[name_match.end():].lstrip()
+                if rest.startswith('(') or rest.startswith('=') and not rest.startswith('=='):
+                    continue  # a call, or a keyword argument such as key=
+                return line, name
+            if target is not None:
+                local.add(target)
+        return None
+    
+    def find_side_effect(self, body, reads=False):
+        """Return the first statement of a spell body that does I/O or mutates a data structure, if any.
+        With reads=True, randomness and reads of data structures count too (anything a pure spell may not do)."""
+        for line in body:
+            line = line.strip()
+            words = line.split()
+            if words and words[0].rstrip(';') in SIDE_EFFECT_STATEMENTS and not (len(words) > 1 and words[1].startswith("=")) \
+                    or 'listen(' in line:
+                return line
+            if reads and (IMPURE_EXPRESSION.search(line)
+                          or any(name in self.data_structures for name in IDENTIFIER.findall(line))):
+                return line
+        return None
+    
+    def make_spell_ref(self, func_name):
+        """Create a Python callable for a spell so it can be passed as a value (e.g. a sort key)"""
+        def spell_ref(*args):
+            if self.native_depth >= MAX_NATIVE_DEPTH:
+                raise SoutkLimitError(f"Recursion too deep ({MAX_NATIVE_DEPTH} nested calls through spell references)")
+            self.native_depth += 1
+            try:
+                return self.invoke_spell(func_name, list(args))
+            finally:
+                self.native_depth -= 1
+        spell_ref.__name__ = func_name
+        return spell_ref
+    
+    def handle_file_operations(self, line):
+        """Handle file I/O operations"""
+        line = line.rstrip(';')
+        
+        # SCROLL - Read file (as text, or parsed as CSV rows or JSON)
+        scroll_match = re.match(r'scroll\s+(?:(csv|json)\s+)?(async\s+)?"([^"]+)"\s+into\s+(\w+)$', line)
+        if scroll_match:
+            file_format, is_async, filename, var_name = scroll_match.groups()
+            reader = {None: read_file, 'csv': read_csv, 'json': read_json}[file_format]
+            
+            if is_async:
+                # Reading an older value after this statement would be surprising
+                self.variables.pop(var_name, None)
+                future = self.submit_io(filename, lambda: reader(filename))
+                self.pending_reads[var_name] = (future, filename, self.line_number, self.call_depth)
+                return True
+            
+            try:
+                self.wait_for_file(filename)
+                self.variables[var_name] = reader(filename)
+                self.print(f"📜 Scrolled '{filename}' into '{var_name}'")
+            except FileNotFoundError:
+                self.error(f"File '{filename}' not found")
+            except Exception as e:
+                self.error(f"Error reading file '{filename}': {str(e)}")
+            return True
         
-        try:
-            # Set parameters
-            for param, arg in zip(func['params'], args):
-                self.variables[param] = self.eval_expr(arg)
+        # INSCRIBE / APPEND - Write or append to file
+        write_match = re.match(r'(inscribe|append)\s+(async\s+)?"([^"]+)"\s+with\s+(.+)$', line)
+        if write_match:
+            command, is_async, filename, data_expr = write_match.groups()
+            if command == "inscribe":
+                mode, data_suffix, message = 'w', '', f"📝 Inscribed data into '{filename}'"
+                failure = f"Error writing to file '{filename}'"
+            else:
+                mode, data_suffix, message = 'a', '\n', f"📝 Appended data to '{filename}'"
+                failure = f"Error appending to file '{filename}'"
             
-            # Execute function body and capture return value
             try:
-                self.execute(func['body'])
-            except ReturnException as ret:
-                return_value = ret.value
-        finally:
-            # Restore original variables
-            self.variables = old_variables
+                # The data is evaluated now; only the disk write happens in the background
+                data = str(self.eval_expr(data_expr)) + data_suffix
+                if is_async:
+                    future = self.submit_io(filename, lambda: write_file(filename, data, mode))
+                    self.pending_writes.append((future, filename, message, self.line_number))
+                else:
+                    self.wait_for_file(filename)
+                    write_file(filename, data, mode)
+                    self.print(message)
+            except FATAL_ERRORS:
+                raise
+            except Exception as e:
+                self.error(f"{failure}: {str(e)}")
+            return True
+        
+        # AWAIT - Wait for background file operations
+        await_match = re.match(r'await(?:\s+(\w+|"[^"]+"))?$', line)
+        if await_match:
+            target = await_match.group(1)
+            if target is None or target == "all":
+                self.wait_for_io()
+            elif target.startswith('"'):
+                self.await_writes(target[1:-1])
+            elif target in self.pending_reads:
+                self.await_read(target)
+            elif target not in self.variables:
+                self.error(f"Nothing to await for '{target}'")
+            return True
+        
+        return False
+    
+    def submit_io(self, filename, operation):
+        """Queue a file operation on the I/O thread pool, after any earlier operation on the same file"""
+        if self.io_pool is None:
+            self.io_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="soutk-io")
+        
+        path = os.path.abspath(filename)
+        previous = self.file_futures.get(path)
+        
+        def task():
+            if previous is not None:
+                previous.exception()  # wait; its error is reported by its own statement
+            return operation()
         
-        return return_value if return_value is not None else 0
+        future = self.io_pool.submit(task)
+        self.file_futures[path] = future
+        return future
+    
+    def wait_for_file(self, filename):
+        """Block until background operations on a file have finished"""
+        future = self.file_futures.get(os.path.abspath(filename))
+        if future is not None:
+            future.exception()
+    
+    def await_read(self, var_name):
+        """Join a background scroll and store its content in the variable"""
+        future, filename, lineno, depth = self.pending_reads[var_name]
+        if depth < self.call_depth:
+            # Started by a caller: the spell sees the content, but it is stored (and reported) in the caller's scope
+            if var_name not in self.variables and future.exception() is None:
+                self.variables[var_name] = future.result()
+            return
+        del self.pending_reads[var_name]
+        if var_name in self.variables:
+            # Assigned since the scroll started (which cleared it): the newer value wins
+            return
+        try:
+            self.variables[var_name] = future.result()
+            self.print(f"📜 Scrolled '{filename}' into '{var_name}'")
+        except FileNotFoundError:
+            print(f"❌ Line {lineno}: File '{filename}' not found", file=self.error_stream())
+        except Exception as e:
+            print(f"❌ Line {lineno}: Error reading file '{filename}': {str(e)}", file=self.error_stream())
+    
+    def await_writes(self, filename=None):
+        """Join background writes (to one file, or all of them) and report their outcome"""
+        remaining = []
+        for future, target, message, lineno in self.pending_writes:
+            if filename is not None and target != filename:
+                remaining.append((future, target, message, lineno))
+                continue
+            error = future.exception()
+            if error is None:
+                self.print(message)
+            else:
+                print(f"❌ Line {lineno}: Error writing to file '{target}': {str(error)}", file=self.error_stream())
+        self.pending_writes = remaining
+    
+    def wait_for_io(self):
+        """Join every outstanding background file operation"""
+        for var_name in list(self.pending_reads):
+            self.await_read(var_name)
+        self.await_writes()
     
     def handle_data_structure_commands(self, line):
         """Handle data structure commands"""
         line = line.rstrip(';')
         parts = line.split()
         
-        if len(parts) < 2:
+        if len(parts) < 2 or parts[1].startswith("="):
+            # "add = 1" assigns a variable that happens to share a command's name
             return False
         
         command = parts[0]
@@ -453,21 +1993,82 @@ class SoutkInterpreter:
             
             ds_type = parts[1]
             ds_name = parts[2]
+            self.purity_epoch += 1  # pure spells that use this name now read a data structure
             
             if ds_type == "stack":
                 self.data_structures[ds_name] = SoutkStack(ds_name)
-                print(f"⚔️ Forged stack '{ds_name}'")
+                self.print(f"⚔️ Forged stack '{ds_name}'")
             elif ds_type == "queue":
                 self.data_structures[ds_name] = SoutkQueue(ds_name)
-                print(f"📋 Forged queue '{ds_name}'")
+                self.print(f"📋 Forged queue '{ds_name}'")
             elif ds_type == "linklist":
                 self.data_structures[ds_name] = SoutkLinkedList(ds_name)
-                print(f"🔗 Forged linked list '{ds_name}'")
+                self.print(f"🔗 Forged linked list '{ds_name}'")
+            elif ds_type == "grimoire":
+                store_match = re.match(r'forge\s+grimoire\s+\w+\s+on\s+"([^"]+)"$', line)
+                if store_match:
+                    path = store_match.group(1)
+                    try:
+                        ds = SoutkStoredGrimoire(ds_name, path)
+                        self.data_structures[ds_name] = ds
+                        self.print(f"📚 Forged grimoire '{ds_name}' on '{path}' ({len(ds)} entries)")
+                    except sqlite3.Error as e:
+                        self.error(f"Cannot open grimoire store '{path}': {str(e)}")
+                elif len(parts) > 3:
+                    self.error('forge grimoire syntax: forge grimoire name [on "file"]')
+                else:
+                    self.data_structures[ds_name] = SoutkGrimoire(ds_name)
+                    self.print(f"📚 Forged grimoire '{ds_name}'")
+            elif ds_type == "sortedgrimoire":
+                self.data_structures[ds_name] = SoutkSortedGrimoire(ds_name)
+                self.print(f"📚 Forged sorted grimoire '{ds_name}'")
+            elif ds_type == "set":
+                self.data_structures[ds_name] = SoutkSet(ds_name)
+                self.print(f"🧺 Forged set '{ds_name}'")
+            elif ds_type == "heap":
+                heap_match = re.match(r'forge\s+heap\s+(\w+)(?:\s+(min|max))?(?:\s+by\s+(\w+))?$', line)
+                if not heap_match:
+                    self.error("forge heap syntax: forge heap name [min|max] [by spell]")
+                    return True
+                ds_name, order, key_spell = heap_match.groups()
+                if key_spell and key_spell not in self.functions:
+                    self.error(f"Function '{key_spell}' not defined")
+                    return True
+                order = order or "min"
+                self.data_structures[ds_name] = SoutkHeap(ds_name, order == "max", key_spell)
+                self.print(f"⛰️ Forged {order} heap '{ds_name}'" + (f" by '{key_spell}'" if key_spell else ""))
             else:
                 return False  # Not a data structure command
             
             return True
         
+        # SORT command - sort a stack, queue, or linked list in place
+        elif command == "sort":
+            sort_match = re.match(r'sort\s+(stack|queue|linklist)\s+(\w+)(?:\s+by\s+(\w+))?$', line)
+            if not sort_match:
+                return False  # Not a data structure command
+            
+            ds_type, ds_name, key_spell = sort_match.groups()
+            ds_classes = {"stack": SoutkStack, "queue": SoutkQueue, "linklist": SoutkLinkedList}
+            
+            if ds_name in self.data_structures:
+                ds = self.data_structures[ds_name]
+                if isinstance(ds, ds_classes[ds_type]):
+                    if key_spell and key_spell not in self.functions:
+                        self.error(f"Function '{key_spell}' not defined")
+                        return True
+                    try:
+                        ds.sort(key=self.resolve_spell_key(key_spell))
+                        self.print(f"🔀 Sorted {ds_type} '{ds_name}'")
+                    except TypeError as e:
+                        self.error(f"Cannot sort '{ds_name}': {str(e)}")
+                else:
+                    self.error(f"'{ds_name}' is not a {ds_type}")
+            else:
+                self.error(f"Data structure '{ds_name}' not found")
+            
+            return True
+        
         # STACK commands
         elif command == "push":
             if len(parts) < 3:
@@ -487,7 +2088,7 @@ class SoutkInterpreter:
                 ds = self.data_structures[stack_name]
                 if isinstance(ds, SoutkStack):
                     ds.push(value)
-                    print(f"⬆️ Pushed '{value}' to stack '{stack_name}'")
+                    self.print(f"⬆️ Pushed '{value}' to stack '{stack_name}'")
                 else:
                     self.error(f"'{stack_name}' is not a stack")
             else:
@@ -507,9 +2108,9 @@ class SoutkInterpreter:
                 if isinstance(ds, SoutkStack):
                     value = ds.pop()
                     if value is not None:
-                        print(f"⬇️ Popped '{value}' from stack '{stack_name}'")
+                        self.print(f"⬇️ Popped '{value}' from stack '{stack_name}'")
                     else:
-                        print(f"Stack '{stack_name}' is empty")
+                        self.print(f"Stack '{stack_name}' is empty")
                 else:
                     self.error(f"'{stack_name}' is not a stack")
             else:
@@ -529,9 +2130,9 @@ class SoutkInterpreter:
                 if isinstance(ds, SoutkStack):
                     value = ds.peek()
                     if value is not None:
-                        print(f"👁️ Top of stack '{stack_name}': '{value}'")
+                        self.print(f"👁️ Top of stack '{stack_name}': '{value}'")
                     else:
-                        print(f"Stack '{stack_name}' is empty")
+                        self.print(f"Stack '{stack_name}' is empty")
                 else:
                     self.error(f"'{stack_name}' is not a stack")
             else:
@@ -550,7 +2151,7 @@ class SoutkInterpreter:
                 ds = self.data_structures[stack_name]
                 if isinstance(ds, SoutkStack):
                     items = ds.show()
-                    print(f"📚 Stack '{stack_name}': {items}")
+                    self.print(f"📚 Stack '{stack_name}': {items}")
                 else:
                     self.error(f"'{stack_name}' is not a stack")
             else:
@@ -577,7 +2178,7 @@ class SoutkInterpreter:
                 ds = self.data_structures[queue_name]
                 if isinstance(ds, SoutkQueue):
                     ds.enqueue(value)
-                    print(f"➡️ Enqueued '{value}' to queue '{queue_name}'")
+                    self.print(f"➡️ Enqueued '{value}' to queue '{queue_name}'")
                 else:
                     self.error(f"'{queue_name}' is not a queue")
             else:
@@ -597,9 +2198,9 @@ class SoutkInterpreter:
                 if isinstance(ds, SoutkQueue):
                     value = ds.dequeue()
                     if value is not None:
-                        print(f"⬅️ Dequeued '{value}' from queue '{queue_name}'")
+                        self.print(f"⬅️ Dequeued '{value}' from queue '{queue_name}'")
                     else:
-                        print(f"Queue '{queue_name}' is empty")
+                        self.print(f"Queue '{queue_name}' is empty")
                 else:
                     self.error(f"'{queue_name}' is not a queue")
             else:
@@ -619,9 +2220,9 @@ class SoutkInterpreter:
                 if isinstance(ds, SoutkQueue):
                     value = ds.front()
                     if value is not None:
-                        print(f"👁️ Front of queue '{queue_name}': '{value}'")
+                        self.print(f"👁️ Front of queue '{queue_name}': '{value}'")
                     else:
-                        print(f"Queue '{queue_name}' is empty")
+                        self.print(f"Queue '{queue_name}' is empty")
                 else:
                     self.error(f"'{queue_name}' is not a queue")
             else:
@@ -640,7 +2241,7 @@ class SoutkInterpreter:
                 ds = self.data_structures[queue_name]
                 if isinstance(ds, SoutkQueue):
                     items = ds.show()
-                    print(f"📋 Queue '{queue_name}': {items}")
+                    self.print(f"📋 Queue '{queue_name}': {items}")
                 else:
                     self.error(f"'{queue_name}' is not a queue")
             else:
@@ -667,7 +2268,7 @@ class SoutkInterpreter:
                 ds = self.data_structures[list_name]
                 if isinstance(ds, SoutkLinkedList):
                     ds.link(value)
-                    print(f"🔗 Linked '{value}' to list '{list_name}'")
+                    self.print(f"🔗 Linked '{value}' to list '{list_name}'")
                 else:
                     self.error(f"'{list_name}' is not a linked list")
             else:
@@ -693,9 +2294,9 @@ class SoutkInterpreter:
                 ds = self.data_structures[list_name]
                 if isinstance(ds, SoutkLinkedList):
                     if ds.unlink(value):
-                        print(f"⛓️‍💥 Unlinked '{value}' from list '{list_name}'")
+                        self.print(f"⛓️‍💥 Unlinked '{value}' from list '{list_name}'")
                     else:
-                        print(f"Value '{value}' not found in list '{list_name}'")
+                        self.print(f"Value '{value}' not found in list '{list_name}'")
                 else:
                     self.error(f"'{list_name}' is not a linked list")
             else:
@@ -729,9 +2330,9 @@ class SoutkInterpreter:
                 ds = self.data_structures[list_name]
                 if isinstance(ds, SoutkLinkedList):
                     if ds.insert_after(after_value, new_value):
-                        print(f"🔗 Inserted '{new_value}' after '{after_value}' in list '{list_name}'")
+                        self.print(f"🔗 Inserted '{new_value}' after '{after_value}' in list '{list_name}'")
                     else:
-                        print(f"Value '{after_value}' not found in list '{list_name}'")
+                        self.print(f"Value '{after_value}' not found in list '{list_name}'")
                 else:
                     self.error(f"'{list_name}' is not a linked list")
             else:
@@ -739,6 +2340,299 @@ class SoutkInterpreter:
             
             return True
         
+        # HEAP commands
+        elif command == "heappush":
+            if len(parts) < 3:
+                self.error("heappush command requires heap name and value")
+                return True
+            
+            heap_name = parts[1]
+            value = " ".join(parts[2:])
+            if value.startswith('"') and value.endswith('"'):
+                value = value[1:-1]
+            elif value.startswith("'") and value.endswith("'"):
+                value = value[1:-1]
+            else:
+                value = self.eval_expr(value)
+            
+            if heap_name in self.data_structures:
+                ds = self.data_structures[heap_name]
+                if isinstance(ds, SoutkHeap):
+                    try:
+                        ds.push(value, key=self.resolve_spell_key(ds.key_spell))
+                        self.print(f"⬆️ Pushed '{value}' to heap '{heap_name}'")
+                    except TypeError as e:
+                        self.error(f"Cannot push '{value}' to heap '{heap_name}': {str(e)}")
+                else:
+                    self.error(f"'{heap_name}' is not a heap")
+            else:
+                self.error(f"Heap '{heap_name}' not found")
+            
+            return True
+        
+        elif command == "heappop" or command == "heappeek":
+            heap_match = re.match(rf'{command}\s+(\w+)(?:\s+into\s+(\w+))?$', line)
+            if not heap_match:
+                self.error(f"{command} syntax: {command} heap [into variable]")
+                return True
+            
+            heap_name, var_name = heap_match.groups()
+            
+            if heap_name in self.data_structures:
+                ds = self.data_structures[heap_name]
+                if isinstance(ds, SoutkHeap):
+                    value = ds.pop() if command == "heappop" else ds.peek()
+                    if value is None:
+                        self.print(f"Heap '{heap_name}' is empty")
+                    elif command == "heappop":
+                        self.print(f"⬇️ Popped '{value}' from heap '{heap_name}'")
+                    else:
+                        self.print(f"👁️ Top of heap '{heap_name}': '{value}'")
+                    if var_name and value is not None:
+                        self.variables[var_name] = value
+                else:
+                    self.error(f"'{heap_name}' is not a heap")
+            else:
+                self.error(f"Heap '{heap_name}' not found")
+            
+            return True
+        
+        elif command == "heapify":
+            if len(parts) < 3:
+                self.error("heapify command requires heap name and an array")
+                return True
+            
+            heap_name = parts[1]
+            values = self.eval_expr(" ".join(parts[2:]))
+            
+            if heap_name in self.data_structures:
+                ds = self.data_structures[heap_name]
+                if not isinstance(ds, SoutkHeap):
+                    self.error(f"'{heap_name}' is not a heap")
+                elif not isinstance(values, (list, tuple)):
+                    self.error(f"heapify needs an array, got {type(values).__name__}")
+                else:
+                    try:
+                        ds.heapify(values, key=self.resolve_spell_key(ds.key_spell))
+                        self.print(f"⛰️ Heapified {len(values)} items into heap '{heap_name}'")
+                    except TypeError as e:
+                        self.error(f"Cannot heapify '{heap_name}': {str(e)}")
+            else:
+                self.error(f"Heap '{heap_name}' not found")
+            
+            return True
+        
+        elif command == "showheap":
+            if len(parts) < 2:
+                self.error("showheap command requires heap name")
+                return True
+            
+            heap_name = parts[1]
+            
+            if heap_name in self.data_structures:
+                ds = self.data_structures[heap_name]
+                if isinstance(ds, SoutkHeap):
+                    self.print(f"⛰️ Heap '{heap_name}': {ds.show()}")
+                else:
+                    self.error(f"'{heap_name}' is not a heap")
+            else:
+                self.error(f"Heap '{heap_name}' not found")
+            
+            return True
+        
+        # BULK commands - load many items in one statement
+        elif command in ("pushall", "enqueueall", "linkall", "bindall"):
+            bulk_match = re.match(rf'{command}\s+(\w+)\s+(?:from\s+)?(.+)$', line)
+            if not bulk_match:
+                self.error(f"{command} syntax: {command} name (array, range, data structure or string)")
+                return True
+            
+            ds_name, source_expr = bulk_match.groups()
+            kind, kind_name = {
+                "pushall": (SoutkStack, "stack"),
+                "enqueueall": (SoutkQueue, "queue"),
+                "linkall": (SoutkLinkedList, "linked list"),
+                "bindall": (SoutkGrimoire, "grimoire")
+            }[command]
+            
+            if ds_name in self.data_structures:
+                ds = self.data_structures[ds_name]
+                if isinstance(ds, kind):
+                    items = self.bulk_items(source_expr)
+                    try:
+                        if command == "pushall":
+                            count = ds.push_all(items)
+                            self.print(f"⬆️ Pushed {count} items to stack '{ds_name}'")
+                        elif command == "enqueueall":
+                            count = ds.enqueue_all(items)
+                            self.print(f"➡️ Enqueued {count} items to queue '{ds_name}'")
+                        elif command == "linkall":
+                            count = ds.link_all(items)
+                            self.print(f"🔗 Linked {count} items to list '{ds_name}'")
+                        else:
+                            count = ds.bind_all(self.bulk_pairs(items))
+                            self.print(f"📖 Bound {count} entries in grimoire '{ds_name}'")
+                    except TypeError as e:
+                        self.error(f"Cannot load {kind_name} '{ds_name}': {str(e)}")
+                else:
+                    self.error(f"'{ds_name}' is not a {kind_name}")
+            else:
+                self.error(f"{kind_name.capitalize()} '{ds_name}' not found")
+            
+            return True
+        
+        # GRIMOIRE commands
+        elif command == "bind":
+            bind_match = re.match(r'bind\s+(\w+)\[(.+?)\]\s*=\s*(.+)$', line)
+            if not bind_match:
+                self.error("bind syntax: bind grimoire[key] = value")
+                return True
+            
+            dict_name, key_expr, value_expr = bind_match.groups()
+            
+            if dict_name in self.data_structures:
+                ds = self.data_structures[dict_name]
+                if isinstance(ds, SoutkGrimoire):
+                    key = self.eval_expr(key_expr)
+                    value = self.eval_expr(value_expr)
+                    if isinstance(value, str) and value.startswith('"') and value.endswith('"'):
+                        value = value[1:-1]
+                    try:
+                        ds.bind(key, value)
+                        self.print(f"📖 Bound '{key}' = '{value}' in grimoire '{dict_name}'")
+                    except TypeError as e:
+                        self.error(f"Cannot bind '{key}' in grimoire '{dict_name}': {str(e)}")
+                else:
+                    self.error(f"'{dict_name}' is not a grimoire")
+            else:
+                self.error(f"Grimoire '{dict_name}' not found")
+            
+            return True
+        
+        elif command == "unbind":
+            if len(parts) < 3:
+                self.error("unbind command requires grimoire name and key")
+                return True
+            
+            dict_name = parts[1]
+            key = self.eval_expr(" ".join(parts[2:]))
+            
+            if dict_name in self.data_structures:
+                ds = self.data_structures[dict_name]
+                if isinstance(ds, SoutkGrimoire):
+                    try:
+                        if ds.unbind(key):
+                            self.print(f"📕 Unbound '{key}' from grimoire '{dict_name}'")
+                        else:
+                            self.print(f"Key '{key}' not found in grimoire '{dict_name}'")
+                    except TypeError:
+                        self.error(f"Cannot use {type(key).__name__} key '{key}' in grimoire '{dict_name}'")
+                else:
+                    self.error(f"'{dict_name}' is not a grimoire")
+            else:
+                self.error(f"Grimoire '{dict_name}' not found")
+            
+            return True
+        
+        elif command == "showgrimoire":
+            if len(parts) < 2:
+                self.error("showgrimoire command requires grimoire name")
+                return True
+            
+            dict_name = parts[1]
+            
+            if dict_name in self.data_structures:
+                ds = self.data_structures[dict_name]
+                if isinstance(ds, SoutkGrimoire):
+                    self.print(f"📚 Grimoire '{dict_name}': {ds.show()}")
+                else:
+                    self.error(f"'{dict_name}' is not a grimoire")
+            else:
+                self.error(f"Grimoire '{dict_name}' not found")
+            
+            return True
+        
+        # SET commands
+        elif command == "add" or command == "discard":
+            if len(parts) < 3:
+                self.error(f"{command} command requires set name and value")
+                return True
+            
+            set_name = parts[1]
+            value = " ".join(parts[2:])
+            if value.startswith('"') and value.endswith('"'):
+                value = value[1:-1]
+            elif value.startswith("'") and value.endswith("'"):
+                value = value[1:-1]
+            else:
+                value = self.eval_expr(value)
+            
+            if set_name in self.data_structures:
+                ds = self.data_structures[set_name]
+                if isinstance(ds, SoutkSet):
+                    try:
+                        if command == "add":
+                            if ds.add(value):
+                                self.print(f"➕ Added '{value}' to set '{set_name}'")
+                            else:
+                                self.print(f"'{value}' is already in set '{set_name}'")
+                        elif ds.discard(value):
+                            self.print(f"➖ Discarded '{value}' from set '{set_name}'")
+                        else:
+                            self.print(f"Value '{value}' not found in set '{set_name}'")
+                    except TypeError:
+                        self.error(f"Cannot put {type(value).__name__} values in set '{set_name}'")
+                else:
+                    self.error(f"'{set_name}' is not a set")
+            else:
+                self.error(f"Set '{set_name}' not found")
+            
+            return True
+        
+        elif command in ("union", "intersect", "difference"):
+            set_match = re.match(rf'{command}\s+(\w+)\s+with\s+(.+)$', line)
+            if not set_match:
+                self.error(f"{command} syntax: {command} set with (set or array)")
+                return True
+            
+            set_name, other_expr = set_match.groups()
+            other = self.eval_expr(other_expr)
+            
+            if set_name in self.data_structures:
+                ds = self.data_structures[set_name]
+                if not isinstance(ds, SoutkSet):
+                    self.error(f"'{set_name}' is not a set")
+                elif not isinstance(other, (SoutkSet, list, tuple)):
+                    self.error(f"{command} needs a set or an array, got {type(other).__name__}")
+                else:
+                    try:
+                        getattr(ds, command)(other)
+                        self.print(f"🧺 Set '{set_name}' now has {len(ds)} items after {command}")
+                    except TypeError:
+                        self.error(f"Cannot {command} set '{set_name}' with unhashable values")
+            else:
+                self.error(f"Set '{set_name}' not found")
+            
+            return True
+        
+        elif command == "showset":
+            if len(parts) < 2:
+                self.error("showset command requires set name")
+                return True
+            
+            set_name = parts[1]
+            
+            if set_name in self.data_structures:
+                ds = self.data_structures[set_name]
+                if isinstance(ds, SoutkSet):
+                    self.print(f"🧺 Set '{set_name}': {ds.show()}")
+                else:
+                    self.error(f"'{set_name}' is not a set")
+            else:
+                self.error(f"Set '{set_name}' not found")
+            
+            return True
+        
         elif command == "traverse":
             if len(parts) < 2:
                 self.error("traverse command requires list name")
@@ -750,7 +2644,7 @@ class SoutkInterpreter:
                 ds = self.data_structures[list_name]
                 if isinstance(ds, SoutkLinkedList):
                     items = ds.traverse()
-                    print(f"🔗 List '{list_name}': {' -> '.join(map(str, items))}")
+                    self.print(f"🔗 List '{list_name}': {' -> '.join(map(str, items))}")
                 else:
                     self.error(f"'{list_name}' is not a linked list")
             else:
@@ -807,40 +2701,124 @@ class SoutkInterpreter:
                 depth -= 1
             
             if depth > 0:
-                body.append(line)
+                body.append(lines[i])
             i += 1
         
         return body
     
+    def collect_block(self, lines, start):
+        """Collect the body of a block statement whose header is at lines[start].
+        Returns the body lines and the index of the closing brace."""
+        i = start
+        depth = 0
+        
+        # Find opening brace (on the header line or on a line of its own)
+        while i < len(lines):
+            if '{' in lines[i]:
+                depth = 1
+                i += 1
+                break
+            i += 1
+        
+        body = []
+        while i < len(lines):
+            body_line = lines[i].strip()
+            # A leading brace closes before anything else on the line opens ("} else {")
+            closes_first = body_line.startswith('}')
+            if closes_first:
+                depth -= 1
+                if depth == 0:
+                    break
+            if '{' in body_line:
+                depth += 1
+            if '}' in body_line and not closes_first:
+                depth -= 1
+                if depth == 0:
+                    break
+            body.append(lines[i])
+            i += 1
+        
+        return body, i
+    
+    def collect_if_blocks(self, lines, start):
+        """Collect the if and else bodies of an if statement whose header is at lines[start].
+        Returns both bodies and the index of the final closing brace."""
+        if_body, i = self.collect_block(lines, start)
+        else_body = []
+        
+        if i < len(lines):
+            closing = lines[i].strip()
+            if closing.startswith("}") and closing[1:].strip().startswith("else"):
+                else_content = closing[1:].strip()[4:].strip()
+                if else_content.startswith("{"):
+                    else_body, i = self.collect_block(lines, i)
+                elif else_content:
+                    # Inline else: "} else statement"
+                    else_body = [SourceLine(else_content, getattr(lines[i], 'lineno', self.line_number))]
+            elif i + 1 < len(lines) and lines[i + 1].strip().startswith("else"):
+                # else on the line after the closing brace
+                i += 1
+                else_body, i = self.collect_block(lines, i)
+        
+        return if_body, else_body, i
+    
+    def parse(self, code):
+        """Split source code into statement lines, keeping original line numbers"""
+        lines = []
+        for lineno, line in enumerate(code.splitlines(), 1):
+            line = line.strip()
+            if line and not line.startswith('//'):
+                lines.append(SourceLine(line, lineno))
+        return lines
+    
     def execute(self, code):
-        """Execute Soutk code with magical keywords support"""
+        """Execute Soutk code with magical keywords support.
+        Returns the FlowSignal that ended the block early, or None."""
         if isinstance(code, str):
-            lines = [line.strip() for line in code.splitlines() 
-                    if line.strip() and not line.strip().startswith('//')]
+            lines = self.parse(code)
         else:
             lines = code
         
+        profiler = self.profiler
+        if profiler is None:
+            return self.execute_lines(lines)
+        
+        profiler.enter_block()
+        try:
+            return self.execute_lines(lines)
+        finally:
+            profiler.exit_block()
+    
+    def execute_top_level(self, code):
+        """Execute a whole program or a timer block, reporting a break or continue that is not inside a loop.
+        Returns the FlowSignal that ended it early, or None."""
+        signal = self.execute(code)
+        if signal is BREAK_SIGNAL or signal is CONTINUE_SIGNAL:
+            self.error(f"'{signal.kind}' outside of a loop")
+            return None
+        return signal
+    
+    def execute_lines(self, lines):
+        """Execute a block of parsed statement lines"""
+        profiler = self.profiler
+        limits = self.limits
+        
         i = 0
         while i < len(lines):
-            self.line_number = i + 1
+            lineno = getattr(lines[i], 'lineno', i + 1)
+            self.line_number = lineno
             line = lines[i].strip()
+            if profiler is not None:
+                profiler.mark_line(lineno, line)
+            if limits is not None:
+                limits.check_step()
             
             try:
                 # FORGE SPELL - Function definitions (check first)
-                if line.startswith("forge spell"):
-                    spell_match = re.search(r'forge spell\s+(\w+)\s*\((.*?)\)', line)
+                if line.startswith("forge spell") or line.startswith("pure"):
+                    spell_match = re.match(SPELL_PATTERN, line)
                     if spell_match:
-                        func_name = spell_match.group(1)
-                        params_str = spell_match.group(2).strip()
-                        params = [param.strip() for param in params_str.split(',')] if params_str else []
-                        
-                        body = self.parse_function_body(lines, i)
-                        
-                        self.functions[func_name] = {
-                            'params': params,
-                            'body': body
-                        }
-                        
+                        self.define_spell(spell_match, self.parse_function_body(lines, i))
                         i = self.find_function_end(lines, i)
                         continue
                 
@@ -849,6 +2827,11 @@ class SoutkInterpreter:
                     i += 1
                     continue
                 
+                # Check for file operations
+                if self.handle_file_operations(line):
+                    i += 1
+                    continue
+                
                 # CHANT - Output
                 if line.startswith("chant"):
                     if line.startswith("chant "):
@@ -861,7 +2844,7 @@ class SoutkInterpreter:
                     result = self.eval_expr(to_print)
                     if isinstance(result, str) and result.startswith('"') and result.endswith('"'):
                         result = result[1:-1]
-                    print(result)
+                    self.print(result)
                 
                 # TRANSFORM - Variable assignment
                 elif line.startswith("transform"):
@@ -887,14 +2870,59 @@ class SoutkInterpreter:
                         try:
                             result = self.call_function(func_name, args_str)
                             # Don't print the result unless it's assigned to a variable
+                        except FATAL_ERRORS:
+                            raise
                         except Exception as e:
                             self.error(str(e))
                     else:
                         self.error("Invalid invoke syntax")
                 
+                # PARALLEL LOOP - Independent iterations across worker processes
+                elif line.startswith("parallel "):
+                    parallel_match = re.match(r'parallel\s+loop\s+(\w+)\s+from\s+(.+?)\s+to\s+(.+?)\s+into\s+(\w+)\s*\{?$', line)
+                    if parallel_match:
+                        var_name, start_val, end_val, results_name = parallel_match.groups()
+                        
+                        start = self.eval_expr(start_val) if not start_val.isdigit() else int(start_val)
+                        end = self.eval_expr(end_val) if not end_val.isdigit() else int(end_val)
+                        
+                        loop_body, i = self.collect_block(lines, i)
+                        
+                        self.variables[results_name] = self.run_parallel_loop(var_name, int(start), int(end), loop_body)
+                    else:
+                        self.error("Invalid parallel loop syntax")
+                
+                # SLEEP - Pause for a number of milliseconds
+                elif line.startswith("sleep "):
+                    sleep_match = re.match(r'sleep\s+(.+?)(?:\s+ms)?\s*;?$', line)
+                    if sleep_match:
+                        self.sleep(float(self.eval_expr(sleep_match.group(1))) / 1000)
+                    else:
+                        self.error("Invalid sleep syntax")
+                
+                # AFTER / EVERY - Timers
+                elif line.startswith("after ") or line.startswith("every "):
+                    timer_match = re.match(r'(after|every)\s+(.+?)\s+ms(?:\s+as\s+(\w+))?\s*\{?$', line)
+                    if timer_match:
+                        kind, delay_expr, timer_name = timer_match.groups()
+                        delay = float(self.eval_expr(delay_expr)) / 1000
+                        timer_body, i = self.collect_block(lines, i)
+                        self.add_timer(delay, timer_body, timer_name, delay if kind == "every" else None)
+                    else:
+                        self.error(f"Invalid {line.split()[0]} syntax")
+                
+                # CANCEL - Stop a named timer
+                elif line.startswith("cancel "):
+                    cancel_match = re.match(r'cancel\s+(\w+)\s*;?$', line)
+                    if cancel_match:
+                        if not self.cancel_timer(cancel_match.group(1)):
+                            self.error(f"Timer '{cancel_match.group(1)}' not found")
+                    else:
+                        self.error("Invalid cancel syntax")
+                
                 # LOOP - Enhanced loop support
                 elif line.startswith("loop"):
-                    loop_match = re.match(r'loop\s+(\w+)\s+from\s+(\d+|\w+)\s+to\s+(\d+|\w+)', line)
+                    loop_match = re.match(r'loop\s+(\w+)\s+from\s+(.+?)\s+to\s+(.+?)\s*\{?$', line)
                     if loop_match:
                         var_name = loop_match.group(1)
                         start_val = loop_match.group(2)
@@ -905,28 +2933,21 @@ class SoutkInterpreter:
                         end = self.eval_expr(end_val) if not end_val.isdigit() else int(end_val)
                         
                         # Find loop body
-                        loop_body = []
-                        i += 1
-                        depth = 0
-                        
-                        while i < len(lines):
-                            body_line = lines[i].strip()
-                            if '{' in body_line:
-                                depth += 1
-                            if '}' in body_line:
-                                depth -= 1
-                                if depth == 0:
-                                    break
-                            if depth > 0:
-                                loop_body.append(body_line)
-                            i += 1
+                        loop_body, i = self.collect_block(lines, i)
                         
                         # Execute loop
                         old_var = self.variables.get(var_name)
                         try:
                             for loop_val in range(int(start), int(end) + 1):
+                                if limits is not None:
+                                    limits.check_step()
                                 self.variables[var_name] = loop_val
-                                self.execute(loop_body)
+                                signal = self.execute(loop_body)
+                                if signal is not None:
+                                    if signal is BREAK_SIGNAL:
+                                        break
+                                    if signal is not CONTINUE_SIGNAL:
+                                        return signal
                         finally:
                             if old_var is not None:
                                 self.variables[var_name] = old_var
@@ -935,95 +2956,100 @@ class SoutkInterpreter:
                     else:
                         self.error("Invalid loop syntax")
                 
+                # FOREACH - Iterate over a data structure or array without copying it
+                elif line.startswith("foreach"):
+                    foreach_match = re.match(r'foreach\s+(\w+)\s+in\s+(.+?)\s*\{?$', line)
+                    if foreach_match:
+                        var_name = foreach_match.group(1)
+                        items = self.foreach_items(foreach_match.group(2))
+                        
+                        # Find loop body
+                        loop_body, i = self.collect_block(lines, i)
+                        
+                        # Execute loop
+                        old_var = self.variables.get(var_name)
+                        try:
+                            for item in items:
+                                if limits is not None:
+                                    limits.check_step()
+                                self.variables[var_name] = item
+                                signal = self.execute(loop_body)
+                                if signal is not None:
+                                    if signal is BREAK_SIGNAL:
+                                        break
+                                    if signal is not CONTINUE_SIGNAL:
+                                        return signal
+                        except SoutkModifiedError as e:
+                            self.line_number = lineno
+                            self.error(str(e))
+                        finally:
+                            if old_var is not None:
+                                self.variables[var_name] = old_var
+                            elif var_name in self.variables:
+                                del self.variables[var_name]
+                    else:
+                        self.error("Invalid foreach syntax")
+                
                 # IF statements
                 elif line.startswith("if"):
-                    if_match = re.match(r'if\s+(.+?)\s*\{?', line)
+                    if_match = re.match(r'if\s+(.+?)\s*\{?$', line)
                     if if_match:
                         condition = if_match.group(1)
                         condition_result = self.eval_expr(condition)
                         
-                        # Find if body
-                        if_body = []
-                        else_body = []
-                        i += 1
-                        depth = 0
-                        in_else = False
+                        # Find if and else bodies
+                        if_body, else_body, i = self.collect_if_blocks(lines, i)
                         
-                        while i < len(lines):
-                            body_line = lines[i].strip()
-                            
-                            if body_line.startswith("} else {") or body_line == "else {":
-                                in_else = True
-                                i += 1
-                                continue
-                            elif body_line.startswith("} else"):
-                                in_else = True
-                                # Handle inline else
-                                else_content = body_line[6:].strip()
-                                if else_content and not else_content.startswith("{"):
-                                    else_body.append(else_content)
-                                i += 1
-                                continue
-                            
-                            if '{' in body_line:
-                                depth += 1
-                            if '}' in body_line:
-                                depth -= 1
-                                if depth == 0:
-                                    break
-                            
-                            if depth > 0:
-                                if in_else:
-                                    else_body.append(body_line)
-                                else:
-                                    if_body.append(body_line)
-                            i += 1
-                        
-                        # Execute appropriate body
+                        # Execute appropriate body (passing on a return, break or continue)
                         if condition_result:
-                            self.execute(if_body)
+                            signal = self.execute(if_body)
                         elif else_body:
-                            self.execute(else_body)
+                            signal = self.execute(else_body)
+                        else:
+                            signal = None
+                        if signal is not None:
+                            return signal
                     else:
                         self.error("Invalid if syntax")
                 
                 # WHILE loops
                 elif line.startswith("while"):
-                    while_match = re.match(r'while\s+(.+?)\s*\{?', line)
+                    while_match = re.match(r'while\s+(.+?)\s*\{?$', line)
                     if while_match:
                         condition = while_match.group(1)
                         
                         # Find while body
-                        while_body = []
-                        i += 1
-                        depth = 0
-                        
-                        while i < len(lines):
-                            body_line = lines[i].strip()
-                            if '{' in body_line:
-                                depth += 1
-                            if '}' in body_line:
-                                depth -= 1
-                                if depth == 0:
-                                    break
-                            if depth > 0:
-                                while_body.append(body_line)
-                            i += 1
+                        while_body, i = self.collect_block(lines, i)
                         
                         # Execute while loop
                         while self.eval_expr(condition):
-                            self.execute(while_body)
+                            if limits is not None:
+                                limits.check_step()
+                            signal = self.execute(while_body)
+                            if signal is not None:
+                                if signal is BREAK_SIGNAL:
+                                    break
+                                if signal is not CONTINUE_SIGNAL:
+                                    return signal
                     else:
                         self.error("Invalid while syntax")
                 
                 # RETURN statements
                 elif line.startswith("return"):
                     if line == "return" or line == "return;":
-                        raise ReturnException(None)
+                        return FlowSignal('return')
                     else:
                         return_expr = line[6:].strip(" ;")
-                        return_value = self.eval_expr(return_expr)
-                        raise ReturnException(return_value)
+                        tail_call = self.match_tail_call(return_expr) if self.call_depth else None
+                        if tail_call:
+                            return FlowSignal('tailcall', (tail_call[0], self.eval_call_args(*tail_call)))
+                        return FlowSignal('return', self.eval_expr(return_expr))
+                
+                # BREAK / CONTINUE - Leave or restart the innermost loop
+                elif line == "break" or line == "break;":
+                    return BREAK_SIGNAL
+                elif line == "continue" or line == "continue;":
+                    return CONTINUE_SIGNAL
                 
                 # Regular variable assignment (fallback)
                 elif '=' in line and not any(op in line for op in ['==', '!=', '<=', '>=', '<', '>']):
@@ -1036,13 +3062,102 @@ class SoutkInterpreter:
                         value = value[1:-1]
                     self.variables[var_name] = value
             
-            except ReturnException as ret:
-                raise ret
+            except FATAL_ERRORS:
+                raise
             except Exception as e:
                 self.error(str(e))
             
             i += 1
 
+def read_file(filename):
+    with open(filename, 'r', encoding='utf-8') as f:
+        return f.read()
+
+def write_file(filename, data, mode='w'):
+    with open(filename, mode, encoding='utf-8') as f:
+        f.write(data)
+
+def read_csv(filename):
+    with open(filename, 'r', encoding='utf-8', newline='') as f:
+        return list(csv.reader(f))
+
+def read_json(filename):
+    with open(filename, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def stream_csv(f):
+    """Yield the rows of an open CSV file, closing it when the rows run out or the loop stops"""
+    with f:
+        yield from csv.reader(f)
+
+def json_value(value):
+    """JSON form of a Soutk data structure (the default hook for to_json)"""
+    if isinstance(value, SoutkLinkedList):
+        return value.traverse()
+    if isinstance(value, (SoutkStack, SoutkQueue, SoutkSet, SoutkHeap, SoutkGrimoire)):
+        return value.show()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+_parallel_pool = None
+_parallel_pool_size = 0
+
+# Open grimoire stores by (resolved path, read only), so grimoires on the same file share a connection.
+# Each thread has its own (sqlite connections cannot be shared between threads, e.g. async sessions).
+_grimoire_stores = threading.local()
+
+def open_grimoire_store(path, read_only=False):
+    """Return this thread's store for a grimoire file, opening it on first use"""
+    stores = getattr(_grimoire_stores, 'stores', None)
+    if stores is None:
+        stores = _grimoire_stores.stores = {}
+    key = (str(Path(path).resolve()), read_only)
+    store = stores.get(key)
+    if store is None:
+        store = stores[key] = SoutkGrimoireStore(path, read_only)
+    return store
+
+def get_parallel_pool(workers):
+    """Return the shared worker pool for parallel loops, creating it on first use"""
+    global _parallel_pool, _parallel_pool_size
+    if _parallel_pool is None or _parallel_pool_size != workers:
+        if _parallel_pool is not None:
+            _parallel_pool.shutdown()
+        _parallel_pool = ProcessPoolExecutor(max_workers=workers)
+        _parallel_pool_size = workers
+    return _parallel_pool
+
+def run_parallel_chunk(state, var_name, body, values):
+    """Run parallel loop iterations on a snapshot of the interpreter state (runs in a worker).
+    Returns each iteration's return value, the output printed by the chunk and the steps it ran
+    (raises SoutkLimitError when the chunk exceeds what is left of the run's limits)."""
+    interpreter = SoutkInterpreter()
+    interpreter.functions = state['functions']
+    interpreter.data_structures = state['data_structures']
+    interpreter.current_file = state['current_file']
+    interpreter.parallel_workers = 1  # nested parallel loops run in this worker
+    for func_name in interpreter.functions:
+        interpreter.spell_refs[func_name] = interpreter.make_spell_ref(func_name)
+    if state.get('limits'):
+        interpreter.set_limits(**state['limits'])
+    
+    results = []
+    output = io.StringIO()
+    try:
+        interpreter.output = output
+        for value in values:
+            # Every iteration starts from the same snapshot of the globals
+            interpreter.variables = dict(state['variables'])
+            interpreter.variables[var_name] = value
+            signal = interpreter.execute(body)
+            result = signal.value if signal is not None and signal.kind == 'return' else None
+            results.append(result if result is not None else 0)
+        interpreter.finish()
+    finally:
+        if interpreter.limits is not None:
+            interpreter.limits.stop()
+    steps = interpreter.limits.steps if interpreter.limits is not None else 0
+    return results, output.getvalue(), steps
+
 def main():
     """Main entry point"""
     import sys
@@ -1066,7 +3181,8 @@ def main():
         
         interpreter = SoutkInterpreter()
         interpreter.current_file = filename
-        interpreter.execute(code)
+        interpreter.execute_top_level(code)
+        interpreter.finish()
         
         print("=" * 50)
         print("✅ Program completed successfully!")
@@ -0,0 +1,291 @@
+"""
+SOUTK Profiler - Per-line and per-spell timing for Soutk programs
+Records call counts, cumulative time and self time, and exports reports as
+a table, JSON, or collapsed stacks for flame graphs. A sampling mode reads the
+interpreter's frames on a timer for low-overhead profiling of long runs.
+"""
+
+import json
+import signal
+import sys
+import threading
+import time
+
+from soutk_interpreter import SoutkInterpreter
+
+
+class ProfileStat:
+    """Timing totals for one source line or spell"""
+    def __init__(self, label):
+        self.label = label
+        self.calls = 0
+        self.cumulative = 0.0
+        self.self_time = 0.0
+        self.active = 0
+
+    def to_dict(self):
+        return {
+            'label': self.label,
+            'calls': self.calls,
+            'cumulative': self.cumulative,
+            'self': self.self_time
+        }
+
+
+class SoutkProfiler:
+    """Deterministic profiler driven by hooks in the interpreter's execute and spell calls"""
+    def __init__(self, clock=time.perf_counter):
+        self.clock = clock
+        self.lines = {}
+        self.spells = {}
+        self.collapsed = {}
+        self.stack = []
+        self.blocks = []
+        self.memo = {}  # pure spell name -> [hits, misses]
+
+    # Interpreter hooks
+
+    def enter_block(self):
+        """A block of statements starts executing"""
+        self.blocks.append(False)
+
+    def exit_block(self):
+        """A block of statements finished (normally or by unwinding)"""
+        if self.blocks.pop():
+            self.pop_frame(self.clock())
+
+    def mark_line(self, lineno, text):
+        """A new statement starts; the previous statement of the same block ends"""
+        now = self.clock()
+        if self.blocks[-1]:
+            self.pop_frame(now)
+        else:
+            self.blocks[-1] = True
+
+        stat = self.lines.get(lineno)
+        if stat is None:
+            stat = ProfileStat(f"line {lineno}: {text}")
+            self.lines[lineno] = stat
+        self.push_frame(stat, f"L{lineno} {text}", now)
+
+    def enter_spell(self, name):
+        """A spell call starts"""
+        stat = self.spells.get(name)
+        if stat is None:
+            stat = ProfileStat(name)
+            self.spells[name] = stat
+        self.push_frame(stat, f"spell {name}", self.clock())
+
+    def exit_spell(self):
+        """A spell call returns"""
+        self.pop_frame(self.clock())
+
+    def record_memo(self, name, hit):
+        """A pure spell call was answered from its cache (hit) or had to run (miss)"""
+        counts = self.memo.setdefault(name, [0, 0])
+        counts[0 if hit else 1] += 1
+
+    # Frame bookkeeping
+
+    def push_frame(self, stat, label, now):
+        label = label.replace(';', '')
+        path = f"{self.stack[-1][1]};{label}" if self.stack else label
+        stat.active += 1
+        self.stack.append([stat, path, now, 0.0])
+
+    def pop_frame(self, now):
+        stat, path, start, child_time = self.stack.pop()
+        elapsed = now - start
+        own_time = elapsed - child_time
+
+        stat.calls += 1
+        stat.self_time += own_time
+        stat.active -= 1
+        if stat.active == 0:
+            # Only the outermost frame of a recursive spell adds cumulative time
+            stat.cumulative += elapsed
+
+        if self.stack:
+            self.stack[-1][3] += elapsed
+        self.collapsed[path] = self.collapsed.get(path, 0.0) + own_time
+
+    # Reports
+
+    def sorted_stats(self, table, sort_by='self'):
+        key = {'self': lambda s: s.self_time, 'cumulative': lambda s: s.cumulative,
+               'calls': lambda s: s.calls}[sort_by]
+        return sorted(table.values(), key=key, reverse=True)
+
+    def report(self, limit=20, sort_by='self'):
+        """Return the profile as a printable table"""
+        out = []
+        for title, table in (("Spells", self.spells), ("Lines", self.lines)):
+            out.append(f"📊 {title} (sorted by {sort_by} time)")
+            out.append(f"{'calls':>10} {'cumulative ms':>14} {'self ms':>12}  location")
+            for stat in self.sorted_stats(table, sort_by)[:limit]:
+                out.append(f"{stat.calls:>10} {stat.cumulative * 1000:>14.3f} "
+                           f"{stat.self_time * 1000:>12.3f}  {stat.label}")
+            out.append("")
+        if self.memo:
+            out.append("🧠 Pure spell caches")
+            out.append(f"{'hits':>10} {'misses':>14} {'hit rate':>12}  spell")
+            for name, (hits, misses) in sorted(self.memo.items(), key=lambda item: sum(item[1]), reverse=True):
+                out.append(f"{hits:>10} {misses:>14} {hits / (hits + misses):>12.1%}  {name}")
+            out.append("")
+        return "\n".join(out)
+
+    def to_json(self):
+        """Return the profile as a JSON-serialisable dictionary"""
+        return {
+            'spells': [stat.to_dict() for stat in self.sorted_stats(self.spells)],
+            'lines': [dict(stat.to_dict(), line=lineno) for lineno, stat in
+                      sorted(self.lines.items(), key=lambda item: item[1].self_time, reverse=True)],
+            'memo': [{'spell': name, 'hits': hits, 'misses': misses}
+                     for name, (hits, misses) in sorted(self.memo.items())]
+        }
+
+    def write_json(self, filename):
+        with open(filename, 'w', encoding='utf-8') as f:
+            json.dump(self.to_json(), f, indent=2)
+
+    def collapsed_stacks(self):
+        """Return the profile in collapsed-stack format (self time in microseconds)"""
+        return "\n".join(f"{path} {int(total * 1_000_000)}"
+                         for path, total in sorted(self.collapsed.items()) if total > 0)
+
+    def write_collapsed(self, filename):
+        with open(filename, 'w', encoding='utf-8') as f:
+            f.write(self.collapsed_stacks() + "\n")
+
+
+class SoutkSampler:
+    """Statistical profiler that periodically samples the interpreter's call stack"""
+    def __init__(self, hz=1000, use_signal=None):
+        self.hz = hz
+        self.interval = 1.0 / hz
+        self.use_signal = use_signal
+        self.stacks = {}
+        self.total = 0
+        self.timer = None
+        self.thread = None
+        self.stop_event = threading.Event()
+        self.target_thread = None
+        self.old_handler = None
+        # Python code objects whose frames describe the Soutk stack
+        self.frame_kinds = {
+            SoutkInterpreter.execute_lines.__code__: 'line',
+            SoutkInterpreter.invoke_spell.__code__: 'spell'
+        }
+
+    def start(self):
+        """Start sampling the calling thread"""
+        self.target_thread = threading.get_ident()
+        can_signal = (hasattr(signal, 'setitimer') and
+                      threading.current_thread() is threading.main_thread())
+        if self.use_signal is None:
+            self.use_signal = can_signal
+        elif self.use_signal and not can_signal:
+            raise ValueError("Signal-based sampling needs setitimer and the main thread")
+
+        if self.use_signal:
+            self.timer = 'signal'
+            self.old_handler = signal.signal(signal.SIGPROF, self.handle_signal)
+            signal.setitimer(signal.ITIMER_PROF, self.interval, self.interval)
+        else:
+            self.timer = 'thread'
+            self.stop_event.clear()
+            self.thread = threading.Thread(target=self.sample_loop, name="soutk-sampler", daemon=True)
+            self.thread.start()
+
+    def stop(self):
+        """Stop sampling"""
+        if self.timer == 'signal':
+            signal.setitimer(signal.ITIMER_PROF, 0, 0)
+            signal.signal(signal.SIGPROF, self.old_handler)
+        elif self.timer == 'thread':
+            self.stop_event.set()
+            self.thread.join()
+
+    def handle_signal(self, signum, frame):
+        self.record(frame)
+
+    def sample_loop(self):
+        while not self.stop_event.wait(self.interval):
+            frame = sys._current_frames().get(self.target_thread)
+            if frame is not None:
+                self.record(frame)
+
+    def record(self, frame):
+        """Record the Soutk stack (spells and statement lines) behind a Python frame"""
+        stack = []
+        frame_kinds = self.frame_kinds
+        while frame is not None:
+            kind = frame_kinds.get(frame.f_code)
+            if kind == 'line':
+                local_vars = frame.f_locals
+                line = local_vars.get('line')
+                if line is not None:
+                    stack.append(f"L{local_vars.get('lineno')} {line.replace(';', '')}")
+            elif kind == 'spell':
+                stack.append(f"spell {frame.f_locals.get('func_name')}")
+            frame = frame.f_back
+
+        if stack:
+            key = tuple(reversed(stack))
+            self.stacks[key] = self.stacks.get(key, 0) + 1
+            self.total += 1
+
+    # Reports
+
+    def hot_frames(self, prefix):
+        """Return {label: [self samples, total samples]} for frames starting with prefix"""
+        counts = {}
+        for stack, count in self.stacks.items():
+            own = next((label for label in reversed(stack) if label.startswith(prefix)), None)
+            for label in set(stack):
+                if label.startswith(prefix):
+                    entry = counts.setdefault(label, [0, 0])
+                    entry[1] += count
+                    if label == own:
+                        entry[0] += count
+        return counts
+
+    def sorted_frames(self, prefix):
+        return sorted(self.hot_frames(prefix).items(), key=lambda item: item[1][0], reverse=True)
+
+    def report(self, limit=20):
+        """Return the hot-spell and hot-line report as a printable table"""
+        total = self.total or 1
+        out = [f"📊 {self.total} samples at {self.hz} Hz ({self.timer} timer)"]
+        for title, prefix in (("Hot spells", "spell "), ("Hot lines", "L")):
+            out.append(f"🔥 {title}")
+            out.append(f"{'self %':>8} {'total %':>8} {'samples':>9}  location")
+            for label, (own, inclusive) in self.sorted_frames(prefix)[:limit]:
+                out.append(f"{own * 100 / total:>8.1f} {inclusive * 100 / total:>8.1f} {own:>9}  {label}")
+            out.append("")
+        return "\n".join(out)
+
+    def to_json(self):
+        """Return the sampled profile as a JSON-serialisable dictionary"""
+        def entries(prefix):
+            return [{'label': label, 'self': own, 'total': inclusive}
+                    for label, (own, inclusive) in self.sorted_frames(prefix)]
+        return {
+            'hz': self.hz,
+            'timer': self.timer,
+            'samples': self.total,
+            'spells': entries("spell "),
+            'lines': entries("L")
+        }
+
+    def write_json(self, filename):
+        with open(filename, 'w', encoding='utf-8') as f:
+            json.dump(self.to_json(), f, indent=2)
+
+    def collapsed_stacks(self):
+        """Return the samples in collapsed-stack format (sample counts)"""
+        return "\n".join(f"{';'.join(stack)} {count}" for stack, count in sorted(self.stacks.items()))
+
+    def write_collapsed(self, filename):
+        with open(filename, 'w', encoding='utf-8') as f:
+            f.write(self.collapsed_stacks() + "\n")
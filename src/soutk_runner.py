@@ -0,0 +1,115 @@
+"""
+SOUTK Runner - Shared program loading and execution
+Used by soutk.py, the interpreter server and the batch runner so that every
+mode prints the same banners and returns the same exit codes.
+"""
+
+import contextlib
+import io
+import os
+import sys
+from pathlib import Path
+
+from soutk_interpreter import SoutkInterpreter
+
+# Parsed programs keyed by resolved path, invalidated when the file changes
+_parse_cache = {}
+
+
+def load_program(filename):
+    """Read and parse a program file, reusing the cached parse if the file is unchanged"""
+    path = Path(filename).resolve()
+    stat = path.stat()
+    stamp = (stat.st_mtime_ns, stat.st_size)
+    cached = _parse_cache.get(path)
+    if cached is not None and cached[0] == stamp:
+        return cached[1]
+
+    with open(path, "r", encoding='utf-8') as f:
+        code = f.read()
+    lines = SoutkInterpreter().parse(code)
+    _parse_cache[path] = (stamp, lines)
+    return lines
+
+
+def clear_cache():
+    """Forget all cached parses"""
+    _parse_cache.clear()
+
+
+def execute_program(interpreter, program, filename):
+    """Run a parsed program with the standard banners and return the exit code"""
+    interpreter.print(f"🚀 Running Soutk program: {filename}")
+    interpreter.print("=" * 50)
+
+    try:
+        interpreter.current_file = filename
+        interpreter.execute_top_level(program)
+        interpreter.finish()
+    except MemoryError:
+        if interpreter.limits is not None and interpreter.limits.max_memory is not None:
+            interpreter.print(f"💥 Fatal error: {interpreter.limits.exceeded('memory')}")
+        else:
+            interpreter.print("💥 Fatal error: out of memory")
+        return 1
+    except Exception as e:
+        interpreter.print(f"💥 Fatal error: {str(e)}")
+        return 1
+    finally:
+        if interpreter.limits is not None:
+            interpreter.limits.stop()
+
+    interpreter.print("=" * 50)
+    interpreter.print("✅ Program completed successfully!")
+    return 0
+
+
+def run_file(filename, interpreter=None, limits=None):
+    """Load and run a program file and return the exit code.
+    limits is a dict of SoutkInterpreter.set_limits arguments."""
+    if not Path(filename).exists():
+        print(f"❌ Error: File '{filename}' not found.")
+        return 1
+
+    try:
+        program = load_program(filename)
+    except Exception as e:
+        print(f"💥 Fatal error: {str(e)}")
+        return 1
+
+    if interpreter is None:
+        interpreter = SoutkInterpreter()
+    if limits:
+        interpreter.set_limits(**limits)
+    return execute_program(interpreter, program, filename)
+
+
+@contextlib.contextmanager
+def redirected_io(stdin_text="", cwd=None):
+    """Give a program its own stdin and working directory and capture its stdout and stderr"""
+    stdout = io.StringIO()
+    stderr = io.StringIO()
+    old_stdin = sys.stdin
+    old_cwd = os.getcwd()
+
+    try:
+        if cwd:
+            os.chdir(cwd)
+        sys.stdin = io.StringIO(stdin_text or "")
+        with contextlib.redirect_stdout(stdout), contextlib.redirect_stderr(stderr):
+            yield stdout, stderr
+    finally:
+        sys.stdin = old_stdin
+        os.chdir(old_cwd)
+
+
+def run_captured(filename, stdin_text="", interpreter=None, cwd=None, limits=None):
+    """Run a program file with the given stdin and return its stdout, stderr and exit code"""
+    with redirected_io(stdin_text, cwd) as (stdout, stderr):
+        exit_code = run_file(filename, interpreter, limits)
+
+    return {
+        'stdout': stdout.getvalue(),
+        'stderr': stderr.getvalue(),
+        'exit_code': exit_code
+    }
@@ -0,0 +1,177 @@
+"""
+SOUTK Runtime - Support library for programs compiled with --emit-python
+A generated module keeps its statement dispatch and control flow in Python and
+calls into this runtime for everything else: expressions, chant and listen,
+spell calls, stacks, queues, linked lists, file operations, timers and
+parallel loops. The runtime is the interpreter with a few statement-level
+entry points added, so a compiled program prints exactly what the interpreted
+one does, errors included.
+"""
+
+import re
+
+# Generated modules import everything they use from here
+from soutk_interpreter import (SoutkInterpreter, SourceLine, FlowSignal, BREAK_SIGNAL, CONTINUE_SIGNAL,
+                               FATAL_ERRORS, SPELL_PATTERN, SoutkModifiedError)
+from soutk_runner import execute_program
+from soutk_transpiler import Deopt, NUMBER_TYPES
+
+# Returned by runtime helpers when evaluating a statement's expression failed (the error is already reported)
+FAILED = object()
+
+
+class CompiledBlock(list):
+    """The statement lines of a block together with the generated function that runs them"""
+    def __init__(self, lines, run):
+        super().__init__(lines)
+        self.run = run
+
+    def __reduce__(self):
+        # Parallel loop workers get the plain lines and interpret them
+        return (list, (list(self),))
+
+
+class SoutkRuntime(SoutkInterpreter):
+    """Interpreter state and statement helpers for a compiled program"""
+    def __init__(self, filename):
+        super().__init__()
+        self.current_file = filename
+
+    def execute(self, code):
+        """Run a compiled block through its generated function, anything else through the interpreter"""
+        run = getattr(code, 'run', None)
+        if run is not None:
+            return run()
+        return super().execute(code)
+
+    def run_lines(self, lines):
+        """Interpret statements the compiler left to the interpreter"""
+        return self.execute_lines(lines)
+
+    def define(self, lineno, header, body, run, native=None):
+        """forge spell: define a spell whose body runs as generated code (native: its numeric translation)"""
+        self.line_number = lineno
+        try:
+            spell_match = re.match(SPELL_PATTERN, header)
+            self.define_spell(spell_match, CompiledBlock(body, run))
+            if native is not None:
+                self.compiled_spells[spell_match.group(2)] = native
+        except FATAL_ERRORS:
+            raise
+        except Exception as e:
+            self.error(str(e))
+
+    def chant(self, lineno, text):
+        self.line_number = lineno
+        try:
+            result = self.eval_expr(text)
+            if isinstance(result, str) and result.startswith('"') and result.endswith('"'):
+                result = result[1:-1]
+            self.print(result)
+        except FATAL_ERRORS:
+            raise
+        except Exception as e:
+            self.error(str(e))
+
+    def assign(self, lineno, var_name, text):
+        """transform name = expr, and plain name = expr"""
+        self.line_number = lineno
+        try:
+            value = self.eval_expr(text)
+            if isinstance(value, str) and value.startswith('"') and value.endswith('"'):
+                value = value[1:-1]
+            self.variables[var_name] = value
+        except FATAL_ERRORS:
+            raise
+        except Exception as e:
+            self.error(str(e))
+
+    def invoke(self, lineno, func_name, args_str):
+        """invoke as a statement (the result is discarded)"""
+        self.line_number = lineno
+        try:
+            self.call_function(func_name, args_str)
+        except FATAL_ERRORS:
+            raise
+        except Exception as e:
+            self.error(str(e))
+
+    def value(self, lineno, text):
+        """Evaluate an if or while condition, or FAILED"""
+        self.line_number = lineno
+        try:
+            return self.eval_expr(text)
+        except FATAL_ERRORS:
+            raise
+        except Exception as e:
+            self.error(str(e))
+            return FAILED
+
+    def loop_range(self, lineno, start_text, end_text):
+        """Evaluate the bounds of a loop. Returns the range to iterate, FAILED when a bound could not
+        be evaluated (the interpreter then runs the body lines once as plain statements), or None
+        when the bounds are not numbers (the loop is skipped)."""
+        self.line_number = lineno
+        try:
+            start = self.eval_expr(start_text) if not start_text.isdigit() else int(start_text)
+            end = self.eval_expr(end_text) if not end_text.isdigit() else int(end_text)
+        except FATAL_ERRORS:
+            raise
+        except Exception as e:
+            self.error(str(e))
+            return FAILED
+        try:
+            return range(int(start), int(end) + 1)
+        except FATAL_ERRORS:
+            raise
+        except Exception as e:
+            self.error(str(e))
+            return None
+
+    def foreach_iter(self, lineno, text):
+        """Evaluate the collection of a foreach. Returns an iterator over it, or FAILED when it
+        could not be evaluated (the interpreter then runs the body lines once as plain statements)."""
+        self.line_number = lineno
+        try:
+            items = self.foreach_items(text)
+        except FATAL_ERRORS:
+            raise
+        except Exception as e:
+            self.error(str(e))
+            return FAILED
+        return self.report_modified(lineno, items)
+
+    def report_modified(self, lineno, items):
+        """Iterate, ending the loop with an error if the collection changes meanwhile"""
+        try:
+            yield from items
+        except SoutkModifiedError as e:
+            self.line_number = lineno
+            self.error(str(e))
+
+    def restore(self, var_name, old_value):
+        """Put back a loop variable's previous value when the loop ends"""
+        if old_value is not None:
+            self.variables[var_name] = old_value
+        elif var_name in self.variables:
+            del self.variables[var_name]
+
+    def outside_loop(self, lineno, signal):
+        """break or continue outside a loop: pass the signal on to the spell or program that reports it"""
+        self.line_number = lineno
+        return signal
+
+    def return_signal(self, lineno, text):
+        """return expr: the FlowSignal to return, or None when the expression failed"""
+        self.line_number = lineno
+        try:
+            tail_call = self.match_tail_call(text) if self.call_depth else None
+            if tail_call:
+                return FlowSignal('tailcall', (tail_call[0], self.eval_call_args(*tail_call)))
+            return FlowSignal('return', self.eval_expr(text))
+        except FATAL_ERRORS:
+            raise
+        except Exception as e:
+            self.error(str(e))
+            return None
+
@@ -0,0 +1,292 @@
+"""
+SOUTK Server - Persistent interpreter daemon on a Unix socket
+Keeps the interpreter imported, a warm interpreter instance and parsed programs
+in memory so short scripts skip Python startup. Each request runs in a forked
+child (or a fresh interpreter where fork is unavailable) so no state leaks
+between requests.
+
+Protocol: one JSON object per line in each direction.
+    request:  {"program": "file.stk", "stdin": "...", "cwd": "/client/working/dir"}
+    response: {"stdout": "...", "stderr": "...", "exit_code": 0}
+"""
+
+import json
+import os
+import selectors
+import signal
+import socket
+import sys
+import threading
+import time
+
+from soutk_interpreter import SoutkInterpreter
+from soutk_runner import load_program, run_captured
+
+DEFAULT_SOCKET = "/tmp/soutk.sock"
+
+# Longest a client may take to send its request before the server drops it
+REQUEST_TIMEOUT = 5.0
+
+
+def read_message(conn):
+    """Read one newline-terminated JSON message from a socket"""
+    data = b""
+    while not data.endswith(b"\n"):
+        chunk = conn.recv(65536)
+        if not chunk:
+            break
+        data += chunk
+    return parse_message(data)
+
+
+def parse_message(data):
+    if not data.strip():
+        raise ValueError("Empty request")
+    return json.loads(data.decode('utf-8'))
+
+
+def send_message(conn, message):
+    conn.sendall(json.dumps(message).encode('utf-8') + b"\n")
+
+
+class SoutkServer:
+    """Accepts program requests on a Unix socket and runs each one in isolation"""
+    def __init__(self, socket_path=DEFAULT_SOCKET, isolation=None, limits=None):
+        self.socket_path = socket_path
+        self.limits = limits  # set_limits arguments applied to every request
+        if isolation is None:
+            isolation = 'fork' if hasattr(os, 'fork') else 'fresh'
+        self.isolation = isolation
+        self.sock = None
+        self.selector = None
+        self.pending = {}  # connection -> [request bytes so far, deadline], until the request line is complete
+        self.children = set()
+        self.requests = 0
+        self.running = False
+        # Constructed once; forked children inherit it already initialised
+        self.warm_interpreter = SoutkInterpreter()
+
+    def start(self):
+        """Bind the socket"""
+        if os.path.exists(self.socket_path):
+            # Refuse to steal the socket of a live server, but clean up a stale one
+            probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            try:
+                probe.connect(self.socket_path)
+                raise OSError(f"A Soutk server is already listening on {self.socket_path}")
+            except ConnectionRefusedError:
+                os.unlink(self.socket_path)
+            finally:
+                probe.close()
+
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.bind(self.socket_path)
+        self.sock.listen(64)
+        self.sock.setblocking(False)
+        # Requests are read as they arrive, so a slow client never holds up the others
+        self.selector = selectors.DefaultSelector()
+        self.selector.register(self.sock, selectors.EVENT_READ)
+
+    def serve_forever(self):
+        """Accept and handle requests until stopped"""
+        if self.sock is None:
+            self.start()
+        self.running = True
+        on_main_thread = threading.current_thread() is threading.main_thread()
+        if on_main_thread:
+            old_handler = signal.signal(signal.SIGTERM, self.handle_sigterm)
+        try:
+            while self.running:
+                self.reap_children()
+                for key, _ in self.selector.select(timeout=1.0):
+                    if key.fileobj is self.sock:
+                        self.accept_connection()
+                    else:
+                        self.read_request(key.fileobj)
+                self.drop_slow_clients()
+        finally:
+            if on_main_thread:
+                signal.signal(signal.SIGTERM, old_handler)
+            self.close()
+
+    def handle_sigterm(self, signum, frame):
+        self.running = False
+
+    def stop(self):
+        self.running = False
+
+    def close(self):
+        """Close the socket and remove the socket file"""
+        for conn in list(self.pending):
+            self.forget(conn)
+            conn.close()
+        if self.selector is not None:
+            self.selector.close()
+            self.selector = None
+        if self.sock is not None:
+            self.sock.close()
+            self.sock = None
+            if os.path.exists(self.socket_path):
+                os.unlink(self.socket_path)
+        while self.children:
+            pid = self.children.pop()
+            try:
+                os.waitpid(pid, 0)
+            except ChildProcessError:
+                pass
+
+    def reap_children(self):
+        """Collect finished request processes"""
+        for pid in list(self.children):
+            try:
+                done, _ = os.waitpid(pid, os.WNOHANG)
+            except ChildProcessError:
+                done = pid
+            if done:
+                self.children.discard(pid)
+
+    def accept_connection(self):
+        try:
+            conn, _ = self.sock.accept()
+        except BlockingIOError:
+            return
+        conn.setblocking(False)
+        self.pending[conn] = [b"", time.monotonic() + REQUEST_TIMEOUT]
+        self.selector.register(conn, selectors.EVENT_READ)
+
+    def read_request(self, conn):
+        """Take what a client has sent; once its request line is complete, handle it"""
+        try:
+            chunk = conn.recv(65536)
+        except BlockingIOError:
+            return
+        except OSError:
+            chunk = b""
+        buffer = self.pending[conn]
+        buffer[0] += chunk
+        if chunk and not buffer[0].endswith(b"\n"):
+            return
+        data = buffer[0]
+        self.forget(conn)
+        conn.setblocking(True)
+        self.handle_connection(conn, data)
+
+    def drop_slow_clients(self):
+        """Reply with an error to clients that have not sent their request in time"""
+        now = time.monotonic()
+        for conn, (_, deadline) in list(self.pending.items()):
+            if now > deadline:
+                self.forget(conn)
+                try:
+                    conn.setblocking(True)
+                    conn.settimeout(1.0)
+                    send_message(conn, {'stdout': "", 'stderr': "💥 Server error: request timed out\n",
+                                        'exit_code': 1})
+                except OSError:
+                    pass
+                conn.close()
+
+    def forget(self, conn):
+        self.selector.unregister(conn)
+        del self.pending[conn]
+
+    def handle_connection(self, conn, data):
+        """Handle one request, running it in a child process (or inline), and reply"""
+        try:
+            request = parse_message(data)
+            self.requests += 1
+
+            if request.get('command') == 'ping':
+                send_message(conn, {'ok': True, 'pid': os.getpid(), 'requests': self.requests})
+                return
+
+            # Parse in the server so the cache survives the forked child
+            try:
+                load_program(os.path.join(request.get('cwd') or "", request['program']))
+            except OSError:
+                pass  # run_file reports the missing file like the command line does
+
+            if self.isolation == 'fork':
+                pid = os.fork()
+                if pid:
+                    self.children.add(pid)
+                    return
+                self.run_child(conn, request)
+            else:
+                send_message(conn, self.run_request(request, SoutkInterpreter()))
+        except Exception as e:
+            try:
+                send_message(conn, {'stdout': "", 'stderr': f"💥 Server error: {str(e)}\n", 'exit_code': 1})
+            except OSError:
+                pass
+        finally:
+            conn.close()
+
+    def run_child(self, conn, request):
+        """Body of a forked request process; never returns"""
+        exit_status = 0
+        try:
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            self.sock.close()
+            for other in self.pending:
+                other.close()  # so the server alone decides when those connections end
+            send_message(conn, self.run_request(request, self.warm_interpreter))
+        except BaseException:
+            exit_status = 1
+        finally:
+            conn.close()
+            os._exit(exit_status)
+
+    def run_request(self, request, interpreter):
+        return run_captured(request['program'], request.get('stdin', ""), interpreter, request.get('cwd'),
+                            self.limits)
+
+
+def submit(program, stdin_text="", socket_path=DEFAULT_SOCKET, cwd=None):
+    """Send a program to a running server and return its stdout, stderr and exit code"""
+    request = {
+        'program': program,
+        'stdin': stdin_text,
+        'cwd': cwd or os.getcwd()
+    }
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as conn:
+        conn.connect(socket_path)
+        send_message(conn, request)
+        return read_message(conn)
+
+
+def ping(socket_path=DEFAULT_SOCKET):
+    """Return the server's status, or None if no server is listening"""
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as conn:
+            conn.connect(socket_path)
+            send_message(conn, {'command': 'ping'})
+            return read_message(conn)
+    except (OSError, ValueError):
+        return None
+
+
+def serve(socket_path=DEFAULT_SOCKET, limits=None):
+    """Run the server in the foreground"""
+    server = SoutkServer(socket_path, limits=limits)
+    server.start()
+    print(f"🔮 Soutk server listening on {socket_path} (isolation: {server.isolation})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    print(f"🛑 Soutk server stopped after {server.requests} request(s)")
+
+
+def run_client(program, socket_path=DEFAULT_SOCKET):
+    """Thin client: forward a program and this process's stdin, replay the output, return the exit code"""
+    stdin_text = "" if sys.stdin is None or sys.stdin.isatty() else sys.stdin.read()
+    try:
+        response = submit(program, stdin_text, socket_path)
+    except (FileNotFoundError, ConnectionRefusedError):
+        print(f"❌ Error: No Soutk server listening on {socket_path}")
+        print("Start one with 'python soutk.py --serve'")
+        return 1
+    sys.stdout.write(response['stdout'])
+    sys.stderr.write(response['stderr'])
+    return response['exit_code']
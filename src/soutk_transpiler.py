@@ -0,0 +1,320 @@
+"""
+SOUTK Transpiler - Compile hot spells into Python functions
+A spell that has been called often enough is translated to Python source and
+compiled with compile(): loop becomes for ... in range, if and while stay
+native, and parameters and locals become Python locals.
+
+Only spells that compute with numbers are translated. They may not print,
+read input, touch files, timers or data structures, read variables they did
+not define themselves, or call spells that break these rules. Because spell
+calls never change the caller's variables, such a spell is a pure function of
+its arguments, and any call can be re-run by the interpreter. That is the
+fallback: when generated code meets a value it was not compiled for, it gives
+up and the interpreter runs the call (and every later one) instead.
+"""
+
+import re
+
+# Calls to a spell before it is transpiled
+TRANSPILE_THRESHOLD = 50
+
+# Values generated code computes with; anything else falls back to the interpreter
+NUMBER_TYPES = (int, float, bool)
+
+COMPARISON_OPS = ['==', '!=', '<=', '>=', '<', '>']
+
+INVOKE_PATTERN = r'invoke\s+(\w+)\s*\((.*?)\)'
+
+TOKEN_PATTERN = re.compile(r'\s*(?:(@\d+@)|(\d+(?:\.\d*)?(?:[eE][+-]?\d+)?|\.\d+)|([A-Za-z_]\w*)|'
+                           r'(==|!=|<=|>=|//|[-+*/%<>(),]))')
+
+# Text a number can turn into when the interpreter substitutes it into an expression
+NUMBER_WORDS = {'e', 'inf', 'nan'}
+
+# Expressions whose value may be a bool
+BOOL_PATTERN = re.compile(r'==|!=|<|>|\b(?:and|or|not|true|false|True|False|invoke)\b')
+
+
+class Unsupported(Exception):
+    """The spell uses something the transpiler does not translate"""
+
+
+class Deopt(Exception):
+    """Raised by generated code when a value leaves the types it was compiled for"""
+
+
+class SpellTranslator:
+    """Translates one spell definition to the source of a Python function"""
+    def __init__(self, interpreter, name):
+        self.interpreter = interpreter
+        self.name = name
+        self.func = interpreter.functions[name]
+        self.params = self.func['params']
+        self.out = []
+        self.temps = 0
+        self.callees = set()
+        self.functions_used = set()
+        self.plus_words = set()
+        self.maybe_bool = set()
+
+    def translate(self):
+        """Return the Python source of the spell"""
+        for param in self.params:
+            if not re.fullmatch(r'[A-Za-z_]\w*', param):
+                raise Unsupported(f"parameter '{param}'")
+
+        self.emit(0, f"def spell_{self.name}({', '.join('v_' + p for p in self.params)}):")
+        # The outer loop lets 'return invoke <this spell>(...)' rebind the parameters and start over
+        self.emit(1, "while True:")
+        self.block(self.func['body'], 2, set(self.params), in_loop=False)
+        self.emit(2, "return 0")
+
+        # The interpreter joins a + expression as strings when the name of any bool variable
+        # occurs in its text, so a local that may hold a bool must not match those words
+        for name in self.maybe_bool:
+            if any(name in word for word in self.plus_words):
+                raise Unsupported(f"variable '{name}' may be a bool and occurs in a + expression")
+        return "\n".join(self.out) + "\n"
+
+    def emit(self, indent, text):
+        self.out.append("    " * indent + text)
+
+    def new_temp(self):
+        self.temps += 1
+        return f"t{self.temps}"
+
+    # Statements, in the order SoutkInterpreter.execute_lines dispatches them
+
+    def block(self, lines, indent, defined, in_loop):
+        start = len(self.out)
+        defined = set(defined)
+        interpreter = self.interpreter
+        i = 0
+        while i < len(lines):
+            line = lines[i].strip()
+            if re.match(r'(?:pure(?:\(\d+\))?\s+)?forge spell', line):
+                raise Unsupported("nested spell definition")
+            if interpreter.find_side_effect([line]) is not None or line.startswith("chant"):
+                raise Unsupported(f"side effect: {line}")
+            if any(line.startswith(prefix) for prefix in ("parallel ", "sleep ", "after ", "every ", "cancel ")):
+                raise Unsupported(f"statement: {line}")
+
+            if line.startswith("transform"):
+                self.assignment(line[9:].strip(), indent, defined)
+            elif line.startswith("invoke"):
+                call_match = re.match(INVOKE_PATTERN, line)
+                if not call_match:
+                    raise Unsupported(line)
+                self.emit(indent, self.call(call_match, indent, defined))
+            elif line.startswith("loop"):
+                loop_match = re.match(r'loop\s+(\w+)\s+from\s+(.+?)\s+to\s+(.+?)\s*\{?$', line)
+                if not loop_match or loop_match.group(1) in defined:
+                    raise Unsupported(line)
+                var_name = loop_match.group(1)
+                start_expr = self.expr(loop_match.group(2), indent, defined)
+                end_expr = self.expr(loop_match.group(3), indent, defined)
+                body, i = interpreter.collect_block(lines, i)
+                self.emit(indent, f"for v_{var_name} in range(int({start_expr}), int({end_expr}) + 1):")
+                self.block(body, indent + 1, defined | {var_name}, in_loop=True)
+            elif line.startswith("if"):
+                if_match = re.match(r'if\s+(.+?)\s*\{?$', line)
+                if not if_match:
+                    raise Unsupported(line)
+                condition = self.expr(if_match.group(1), indent, defined)
+                if_body, else_body, i = interpreter.collect_if_blocks(lines, i)
+                self.emit(indent, f"if {condition}:")
+                self.block(if_body, indent + 1, defined, in_loop)
+                if else_body:
+                    self.emit(indent, "else:")
+                    self.block(else_body, indent + 1, defined, in_loop)
+            elif line.startswith("while"):
+                while_match = re.match(r'while\s+(.+?)\s*\{?$', line)
+                if not while_match:
+                    raise Unsupported(line)
+                body, i = interpreter.collect_block(lines, i)
+                prelude = []
+                condition = self.expr(while_match.group(1), indent + 1, defined, prelude)
+                if prelude:
+                    # Spell calls in the condition run before every test
+                    self.emit(indent, "while True:")
+                    self.out.extend(prelude)
+                    self.emit(indent + 1, f"if not ({condition}):")
+                    self.emit(indent + 2, "break")
+                else:
+                    self.emit(indent, f"while {condition}:")
+                self.block(body, indent + 1, defined, in_loop=True)
+            elif line.startswith("return"):
+                self.return_statement(line, indent, defined, in_loop)
+            elif line in ("break", "break;", "continue", "continue;"):
+                if not in_loop:
+                    raise Unsupported(f"'{line}' outside of a loop")
+                self.emit(indent, line.rstrip(';'))
+            elif '=' in line and not any(op in line for op in COMPARISON_OPS):
+                self.assignment(line, indent, defined)
+            else:
+                raise Unsupported(line)
+            i += 1
+
+        if len(self.out) == start:
+            self.emit(indent, "pass")
+
+    def assignment(self, text, indent, defined):
+        if '=' not in text:
+            raise Unsupported(text)
+        var_name, expr = text.split('=', 1)
+        var_name = var_name.strip()
+        if not re.fullmatch(r'[A-Za-z_]\w*', var_name):
+            raise Unsupported(f"assignment to '{var_name}'")
+        expr = expr.strip(' ;')
+        value = self.expr(expr, indent, defined)
+        self.emit(indent, f"v_{var_name} = {value}")
+        defined.add(var_name)
+        names = set(re.findall(r'[A-Za-z_]\w*', expr))
+        if BOOL_PATTERN.search(expr) or names & self.maybe_bool:
+            self.maybe_bool.add(var_name)
+
+    def return_statement(self, line, indent, defined, in_loop):
+        if line in ("return", "return;"):
+            self.emit(indent, "return 0")
+            return
+        expr = line[6:].strip(" ;")
+        tail_call = self.interpreter.match_tail_call(expr)
+        if tail_call and tail_call[0] == self.name and not in_loop:
+            # Self tail call: rebind the parameters and run the body again
+            args = self.arguments(tail_call[0], tail_call[1], indent, defined)
+            if args:
+                self.emit(indent, f"{', '.join('v_' + p for p in self.params)} = {', '.join(args)},")
+            self.emit(indent, "continue")
+            return
+        self.emit(indent, f"return {self.expr(expr, indent, defined)}")
+
+    # Expressions
+
+    def call(self, call_match, indent, defined):
+        """Translate 'invoke spell(args)' to a call through the interpreter"""
+        callee, args_str = call_match.groups()
+        args = self.arguments(callee, args_str, indent, defined)
+        self.callees.add(callee)
+        return f"invoke({callee!r}, ({''.join(arg + ', ' for arg in args)}))"
+
+    def arguments(self, callee, args_str, indent, defined):
+        if callee not in self.interpreter.functions:
+            raise Unsupported(f"unknown spell '{callee}'")
+        if '(' in args_str:
+            # The interpreter's call pattern stops at the first ')'
+            raise Unsupported(f"nested parentheses in arguments to '{callee}'")
+        args = [arg.strip() for arg in args_str.split(',')] if args_str.strip() else []
+        if len(args) != len(self.interpreter.functions[callee]['params']):
+            raise Unsupported(f"wrong number of arguments to '{callee}'")
+        return [self.expr(arg, indent, defined) for arg in args]
+
+    def expr(self, text, indent, defined, prelude=None):
+        """Translate an expression. Spell calls in it are made first (like the interpreter does),
+        each into a temporary, by statements emitted before the one that uses the result."""
+        text = text.strip()
+        if any(char in text for char in '"\'[]{}\\@') or '**' in text or 'listen' in text:
+            raise Unsupported(f"expression: {text}")
+        if '+' in text and not any(op in text for op in COMPARISON_OPS):
+            # Words the interpreter's text of this expression can contain after substitution
+            names = set(re.findall(r'[A-Za-z_]\w*', text))
+            self.plus_words |= NUMBER_WORDS | (names - defined)
+            if 'invoke' in names or names & self.maybe_bool:
+                self.plus_words |= {'True', 'False'}
+
+        temps = []
+
+        def replace_call(call_match):
+            temp = self.new_temp()
+            temps.append((temp, self.call(call_match, indent, defined)))
+            return f"@{len(temps) - 1}@"
+
+        text = re.sub(INVOKE_PATTERN, replace_call, text)
+        target = self.out if prelude is None else prelude
+        for temp, call in temps:
+            target.append("    " * indent + f"{temp} = {call}")
+            target.append("    " * indent + f"if type({temp}) not in NUMBER_TYPES:")
+            target.append("    " * (indent + 1) + f"raise Deopt({temp!r})")
+
+        tokens = []
+        position = 0
+        text = text.rstrip()
+        while position < len(text):
+            token_match = TOKEN_PATTERN.match(text, position)
+            if not token_match or token_match.end() == position:
+                raise Unsupported(f"expression: {text}")
+            position = token_match.end()
+            temp, number, name, operator = token_match.groups()
+            if temp:
+                tokens.append(temps[int(temp[1:-1])][0])
+            elif number:
+                tokens.append(number)
+            elif operator:
+                tokens.append(operator)
+            elif name in ('and', 'or', 'not'):
+                tokens.append(name)
+            elif name in ('true', 'True'):
+                tokens.append("True")
+            elif name in ('false', 'False'):
+                tokens.append("False")
+            elif text[position:].lstrip().startswith('('):
+                if name in defined or not (name in self.interpreter.math_functions or name in ('int', 'float')):
+                    raise Unsupported(f"call to '{name}'")
+                self.functions_used.add(name)
+                tokens.append(f"f_{name}")
+            elif name in defined:
+                tokens.append(f"v_{name}")
+            else:
+                raise Unsupported(f"variable '{name}' is not a parameter or local of the spell")
+        if not tokens:
+            raise Unsupported("empty expression")
+        return "(" + " ".join(tokens) + ")"
+
+
+def compile_spell(interpreter, name, visiting=None, compiled_now=None):
+    """Transpile a spell (and the spells it calls) and return its Python function, or None.
+    The outcome is stored in interpreter.compiled_spells."""
+    compiled_spells = interpreter.compiled_spells
+    visiting = visiting if visiting is not None else []
+    compiled_now = compiled_now if compiled_now is not None else []
+    mark = len(compiled_now)
+    visiting.append(name)
+    try:
+        translator = SpellTranslator(interpreter, name)
+        source = translator.translate()
+        for callee in sorted(translator.callees):
+            if callee in visiting:
+                continue  # recursion: assumed fine, and undone below if this spell fails
+            if callee not in compiled_spells:
+                compile_spell(interpreter, callee, visiting, compiled_now)
+            if compiled_spells[callee] is None and callee not in interpreter.deoptimized_spells:
+                raise Unsupported(f"calls spell '{callee}', which cannot be transpiled")
+
+        namespace = {
+            'invoke': interpreter.invoke_spell,
+            'Deopt': Deopt,
+            'NUMBER_TYPES': NUMBER_TYPES
+        }
+        for function_name in translator.functions_used:
+            namespace[f"f_{function_name}"] = interpreter.math_functions.get(function_name) or \
+                {'int': int, 'float': float}[function_name]
+        exec(compile(source, f"<spell {name}>", "exec"), namespace)
+        function = namespace[f"spell_{name}"]
+        function.soutk_source = source
+        function.plus_words = translator.plus_words
+    except (Unsupported, SyntaxError):
+        # Spells translated while this one was assumed to be fine are dropped too
+        for callee in compiled_now[mark:]:
+            compiled_spells.pop(callee, None)
+        del compiled_now[mark:]
+        function = None
+    finally:
+        visiting.pop()
+
+    compiled_spells[name] = function
+    compiled_now.append(name)
+    return function
+
+
+def spell_source(interpreter, name):
+    """Return the Python source generated for a spell (raises Unsupported)"""
+    return SpellTranslator(interpreter, name).translate()
@@ -2,38 +2,82 @@
 """
 Soutk Programming Language Test Suite
 Runs all tests to verify language functionality
+
+A test passes when its program exits cleanly and its output matches
+expected/<name>.out, or, for tests without an expected file, when it
+reports no errors. To record an expected file, run from this directory:
+    python ../soutk.py test_programs/<name>.stk > expected/<name>.out
 """
 
 import os
 import sys
-import subprocess
 from pathlib import Path
 
 # Add src directory to path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
 
-def run_test(test_file, description):
-    """Run a single test file"""
+from soutk_batch import make_job, run_batch
+
+TEST_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Seconds a single test program may run before it counts as failed
+TEST_TIMEOUT = 60
+
+# Output lines that mean a program reported an error
+ERROR_MARKERS = ("❌", "💥")
+
+def normalize(output):
+    """Normalise program output for comparison"""
+    return "\n".join(line.rstrip() for line in output.strip().splitlines())
+
+def read_expected(test_file):
+    """Return the expected output of a test, or None when it has no expected file"""
+    expected_path = Path(TEST_DIR) / "expected" / (Path(test_file).stem + ".out")
+    if not expected_path.exists():
+        return None
+    return normalize(expected_path.read_text(encoding='utf-8'))
+
+def find_problem(result, expected):
+    """Return why a finished test failed, or None if it passed"""
+    output = normalize(result['stdout'])
+    if expected is not None:
+        if output == expected:
+            return None
+        for lineno, (got, wanted) in enumerate(zip(output.splitlines(), expected.splitlines()), 1):
+            if got != wanted:
+                return f"Output line {lineno} is {got!r}, expected {wanted!r}"
+        return f"Output has {len(output.splitlines())} lines, expected {len(expected.splitlines())}"
+    for line in output.splitlines():
+        if line.startswith(ERROR_MARKERS):
+            return line
+    return None
+
+def report_test(result, description, expected=None):
+    """Print the outcome of a single test file"""
     print(f"🧪 Testing: {description}")
-    print(f"   File: {test_file}")
+    print(f"   File: {result['program']}")
     
-    try:
-        result = subprocess.run([
-            sys.executable, 
-            os.path.join('..', 'soutk.py'), 
-            test_file
-        ], capture_output=True, text=True, cwd=os.path.dirname(__file__))
-        
-        if result.returncode == 0:
-            print("   ✅ PASSED")
-            return True
-        else:
-            print("   ❌ FAILED")
-            print(f"   Error: {result.stderr}")
-            return False
-    except Exception as e:
-        print(f"   💥 ERROR: {str(e)}")
+    if result['status'] == 'timeout':
+        print(f"   ⏳ TIMED OUT after {TEST_TIMEOUT}s")
         return False
+    elif result['status'] != 'passed':
+        print("   ❌ FAILED")
+        print(f"   Error: {result['stderr'] or result['stdout'].strip().splitlines()[-1:]}")
+        return False
+    
+    problem = find_problem(result, expected)
+    if problem is not None:
+        print("   ❌ FAILED")
+        print(f"   Error: {problem}")
+        return False
+    print("   ✅ PASSED")
+    return True
+
+def parse_jobs(argv):
+    """Read an optional --jobs N argument (default: one worker per CPU)"""
+    if "--jobs" in argv:
+        return int(argv[argv.index("--jobs") + 1])
+    return os.cpu_count() or 1
 
 def main():
     """Run all tests"""
@@ -50,23 +94,54 @@ def main():
         ("string_methods.stk", "String manipulation methods"),
         ("math_functions.stk", "Mathematical functions"),
         ("control_structures.stk", "Loops and conditionals"),
-        ("comprehensive.stk", "All features combined")
+        ("comprehensive.stk", "All features combined"),
+        ("sorting.stk", "Native sorting builtins and sort command"),
+        ("parallel_loop.stk", "Parallel loop across worker processes"),
+        ("async_file_io.stk", "Background file I/O with await"),
+        ("timers.stk", "Sleep, after/every timers and cancel"),
+        ("recursion.stk", "Tail calls and deep recursion"),
+        ("pure_spells.stk", "Memoized pure spells"),
+        ("break_continue.stk", "Break, continue and early return"),
+        ("transpiled_spells.stk", "Hot numeric spells compiled to Python"),
+        ("int_fast_path.stk", "Integer arithmetic fast path"),
+        ("heaps.stk", "Heaps (priority queues)"),
+        ("sets.stk", "Hash sets with O(1) membership"),
+        ("sorted_grimoire.stk", "Grimoires and sorted grimoires"),
+        ("stored_grimoire.stk", "Grimoires stored on disk"),
+        ("foreach.stk", "Foreach over data structures"),
+        ("bulk_commands.stk", "Bulk data structure commands"),
+        ("csv_json.stk", "CSV and JSON parsing"),
+        ("name_shadowing.stk", "Variables named after builtins and spells"),
+        ("pure_spell_purity.stk", "Pure spells that call impure spells or read data structures"),
+        ("loose_break.stk", "break outside of a loop"),
+        ("loose_continue.stk", "continue outside of a loop")
     ]
     
     passed = 0
-    total = len(tests)
+    skipped = 0
     
+    # Run every test program that exists across a process pool
+    jobs = []
+    checks = []
     for test_file, description in tests:
         test_path = os.path.join("test_programs", test_file)
-        if os.path.exists(test_path):
-            if run_test(test_path, description):
-                passed += 1
+        if os.path.exists(os.path.join(TEST_DIR, test_path)):
+            jobs.append(make_job(test_path, cwd=TEST_DIR, timeout=TEST_TIMEOUT))
+            checks.append((description, read_expected(test_file)))
         else:
-            print(f"⚠️  Test file not found: {test_path}")
+            print(f"⏭️  Skipped (test file not found): {test_path}")
+            print()
+            skipped += 1
+    
+    total = len(jobs)
+    results = run_batch(jobs, parse_jobs(sys.argv[1:]))
+    for result, (description, expected) in zip(results, checks):
+        if report_test(result, description, expected):
+            passed += 1
         print()
     
     print("=" * 50)
-    print(f"📊 Test Results: {passed}/{total} tests passed")
+    print(f"📊 Test Results: {passed}/{total} tests passed" + (f", {skipped} skipped" if skipped else ""))
     
     if passed == total:
         print("🎉 All tests passed! Soutk is working perfectly!")